@@ -2,40 +2,39 @@
 # Covers: User Management, Moods, Companion Energies, Cosmic Energy Cards, Chat, Subscriptions
 
 from fastapi import FastAPI, HTTPException, Depends, Query, Path
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse, Response
+from pydantic import TypeAdapter
 from typing import Dict, List, Optional, Any
 import datetime
 import os
 import logging
-import json
+import orjson
+import asyncio
+import base64
+import pytz
+from decimal import Decimal
 from uuid import UUID, uuid4
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, acreate_client, AsyncClient
 import supabase_helpers as sb
 from memory.tiny_memory import TinyMemory
-from chains.multi_prompt_chain import MultiPromptManager
+from memory.sqlite_memory import SQLiteMemory
+from chains.multi_prompt_chain import MultiPromptManager, memory_call
 from chains.classifier import classify_message
-
-# Custom JSON encoder to handle date and datetime objects
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (datetime.date, datetime.datetime)):
-            return obj.isoformat()
-        if isinstance(obj, UUID):
-            return str(obj)
-        return super().default(obj)
-
-# Custom JSONResponse class using our encoder
-class CustomJSONResponse(JSONResponse):
-    def render(self, content):
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-            cls=CustomJSONEncoder,
-        ).encode("utf-8")
+from cache.reference_cache import ReferenceCache
+from cache.card_cache import CosmicCardCache, run_card_cache_scheduler
+from cache.response_cache import ResponseCache
+from cache.singleflight import SingleFlight
+from astrology.zodiac import get_zodiac_sign, get_zodiac_traits
+from astrology.natal_chart import compute_natal_chart
+from write_behind import WriteBehindQueue
+from responses import FastJSONResponse, json_default
+from logging_config import PAYLOAD_LOGGER, Truncated, setup_logging
+from metrics import (
+    REGISTRY, LLMMetricsCallback, MetricsMiddleware,
+    hit_ratio_gauge, instrument_postgrest, stats_gauges
+)
+from tracing import TracingMiddleware, span
 
 # Import our new models
 from models import (
@@ -51,15 +50,17 @@ from models import (
     MessageBase, MessageCreate, MessageResponse,
     SubscriptionBase, SubscriptionCreate, SubscriptionResponse,
     UserIdRequest, MessageRequest, MoodCheckInRequest, CompanionEnergyRequest,
-    CosmicEnergyCardRequest, ConversationRequest, MessageSendRequest
+    CosmicEnergyCardRequest, ConversationRequest, MessageSendRequest,
+    AstroProfileRequest, AstroProfileResponse
 )
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
+# Setup logging (levels, format and payload sampling come from LOG_* env vars)
+setup_logging()
 logger = logging.getLogger(__name__)
+payload_logger = logging.getLogger(PAYLOAD_LOGGER)
 
 # LangChain + OpenAI
 from langchain_openai import ChatOpenAI
@@ -71,29 +72,50 @@ app = FastAPI(
     title="Astrology API",
     description="API for astrological insights, user profiles, and AI chat",
     version="1.0.0",
-    default_response_class=CustomJSONResponse
+    default_response_class=FastJSONResponse
 )
+app.add_middleware(MetricsMiddleware)
+
+# Per-request spans in a Server-Timing header, and ?profile=1 for holders of PROFILE_TOKEN.
+# Without either the middleware isn't installed at all.
+TRACE_REQUESTS = os.getenv("TRACE_REQUESTS", "false").lower() == "true"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+if TRACE_REQUESTS or PROFILE_TOKEN:
+    app.add_middleware(
+        TracingMiddleware,
+        trace=TRACE_REQUESTS,
+        slow_ms=float(os.getenv("TRACE_SLOW_MS", "0")),
+        profile_token=PROFILE_TOKEN,
+        profile_dir=os.getenv("PROFILE_DIR", "/tmp/astro-profiles")
+    )
+
+# Time every Supabase query by table (see /metrics)
+instrument_postgrest()
 
 # Initialize memory manager and prompt manager
-memory_manager = TinyMemory()
-multi_prompt_manager = MultiPromptManager(openai_api_key=os.getenv("OPENAI_API_KEY"))
-
-# Initialize Supabase client with custom JSON encoder
-class JSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, UUID):
-            return str(obj)
-        if isinstance(obj, (datetime.date, datetime.datetime, datetime.time)):
-            return obj.isoformat()
-        return super().default(obj)
-
-# Monkey patch json.dumps to use our encoder
-original_dumps = json.dumps
-def patched_dumps(*args, **kwargs):
-    kwargs.setdefault('cls', JSONEncoder)
-    return original_dumps(*args, **kwargs)
-
-json.dumps = patched_dumps
+# MEMORY_BACKEND=sqlite shares chat memory between all workers on the host
+if os.getenv("MEMORY_BACKEND", "local") == "sqlite":
+    memory_manager = SQLiteMemory(
+        os.getenv("MEMORY_DB_PATH", "/tmp/astro_memory.db"),
+        max_users=int(os.getenv("MEMORY_MAX_USERS", "10000")),
+        ttl_seconds=float(os.getenv("MEMORY_TTL_SECONDS", "3600"))
+    )
+else:
+    memory_manager = TinyMemory(
+        max_users=int(os.getenv("MEMORY_MAX_USERS", "10000")),
+        ttl_seconds=float(os.getenv("MEMORY_TTL_SECONDS", "3600"))
+    )
+# Opt-in: share replies to repeated opening messages between users of the same sign and companion energy
+response_cache = ResponseCache(
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+    variants=int(os.getenv("RESPONSE_CACHE_VARIANTS", "3")),
+    max_keys=int(os.getenv("RESPONSE_CACHE_MAX_KEYS", "10000"))
+) if os.getenv("RESPONSE_CACHE", "false").lower() == "true" else None
+multi_prompt_manager = MultiPromptManager(
+    openai_api_key=os.getenv("OPENAI_API_KEY"),
+    callbacks=[LLMMetricsCallback()],
+    response_cache=response_cache
+)
 
 # Use real Supabase data
 DEV_MODE = False
@@ -104,70 +126,117 @@ supabase: Client = create_client(
     os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 )
 
-# Zodiac signs reference
-ZODIAC_SIGNS = [
-    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
-    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+# Async Supabase client for the async request paths, created once the event loop is running
+async_supabase: Optional[AsyncClient] = None
+
+@app.on_event("startup")
+async def init_async_supabase():
+    global async_supabase
+    async_supabase = await acreate_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    )
+
+# Reference tables (moods, companion energies, cosmic energy types) served from memory
+reference_cache = ReferenceCache(
+    supabase,
+    ttl_seconds=float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "3600"))
+)
+
+@app.on_event("startup")
+async def warm_reference_cache():
+    if os.getenv("REFERENCE_CACHE_WARM_ON_STARTUP", "false").lower() != "true":
+        return
+    try:
+        await asyncio.to_thread(reference_cache.warm)
+    except Exception as e:
+        # A cold cache just means the first requests load the tables themselves
+        logger.warning(f"Error warming reference cache: {str(e)}")
+
+# Serialized cosmic energy card responses per (zodiac_sign, date), kept warm for today and tomorrow
+cosmic_card_adapter = TypeAdapter(List[CosmicEnergyCardResponse])
+cosmic_card_cache = CosmicCardCache(
+    supabase,
+    serialize=lambda cards: cosmic_card_adapter.dump_json(cosmic_card_adapter.validate_python(cards)),
+    refresh_seconds=float(os.getenv("COSMIC_CARD_CACHE_REFRESH_SECONDS", "900"))
+)
+card_cache_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_card_cache_scheduler():
+    global card_cache_task
+    card_cache_task = asyncio.create_task(
+        run_card_cache_scheduler(cosmic_card_cache)
+    )
+
+@app.on_event("shutdown")
+async def stop_card_cache_scheduler():
+    if card_cache_task is not None:
+        card_cache_task.cancel()
+
+# Concurrent lookups of the same conversation (retries, double submits) share one query
+conversation_reads = SingleFlight()
+
+# Non-critical writes (conversation touches, card read marks) flushed in batches off the request path
+write_behind = WriteBehindQueue(
+    supabase,
+    max_batch=int(os.getenv("WRITE_BEHIND_MAX_BATCH", "200")),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "1.0"))
+)
+
+@app.on_event("startup")
+async def start_write_behind():
+    write_behind.start()
+
+@app.on_event("shutdown")
+async def drain_write_behind():
+    # Flush whatever is still queued before the worker exits
+    await asyncio.to_thread(write_behind.stop)
+
+# Cache, memory and write-behind numbers, read from their stats() at scrape time
+CACHE_SOURCES = [
+    ("reference_cache", reference_cache.stats),
+    ("cosmic_card_cache", cosmic_card_cache.stats),
+    ("chat_memory", memory_manager.stats),
 ]
+if response_cache is not None:
+    CACHE_SOURCES.append(("response_cache", response_cache.stats))
+REGISTRY.register(stats_gauges(
+    "astro_cache_stats", "Cache and chat memory counters",
+    CACHE_SOURCES, ("hits", "misses", "coalesced", "users", "evictions", "expirations", "keys", "tokens_saved")
+))
+REGISTRY.register(hit_ratio_gauge("astro_cache_hit_ratio", "Cache hit ratio since startup", CACHE_SOURCES))
+REGISTRY.register(stats_gauges(
+    "astro_singleflight", "Upstream reads made and joined by concurrent identical requests",
+    [("conversations", conversation_reads.stats)], ("calls", "shared", "in_flight")
+))
+REGISTRY.register(stats_gauges(
+    "astro_write_behind", "Write-behind queue depth and totals",
+    [("write_behind", write_behind.stats)], ("depth", "flushed", "coalesced", "failed")
+))
 
-# Helper functions for the new API
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
-def get_zodiac_sign(birth_date):
-    # Convert string to date object if needed
-    if isinstance(birth_date, str):
-        try:
-            # Try to parse the date string
-            birth_date = datetime.datetime.strptime(birth_date, "%Y-%m-%d").date()
-        except Exception as e:
-            logger.error(f"Error parsing birth date: {str(e)}")
-            # Default to Aries if we can't parse the date
-            return "Aries"
-    
-    month = birth_date.month
-    day = birth_date.day
-    
-    if (month == 3 and day >= 21) or (month == 4 and day <= 19):
-        return "Aries"
-    elif (month == 4 and day >= 20) or (month == 5 and day <= 20):
-        return "Taurus"
-    elif (month == 5 and day >= 21) or (month == 6 and day <= 20):
-        return "Gemini"
-    elif (month == 6 and day >= 21) or (month == 7 and day <= 22):
-        return "Cancer"
-    elif (month == 7 and day >= 23) or (month == 8 and day <= 22):
-        return "Leo"
-    elif (month == 8 and day >= 23) or (month == 9 and day <= 22):
-        return "Virgo"
-    elif (month == 9 and day >= 23) or (month == 10 and day <= 22):
-        return "Libra"
-    elif (month == 10 and day >= 23) or (month == 11 and day <= 21):
-        return "Scorpio"
-    elif (month == 11 and day >= 22) or (month == 12 and day <= 21):
-        return "Sagittarius"
-    elif (month == 12 and day >= 22) or (month == 1 and day <= 19):
-        return "Capricorn"
-    elif (month == 1 and day >= 20) or (month == 2 and day <= 18):
-        return "Aquarius"
-    else:
-        return "Pisces"
-
-def get_zodiac_traits(sign):
-    """Get traits for a zodiac sign"""
-    traits = {
-        "Aries": "Bold, energetic, pioneering",
-        "Taurus": "Grounded, patient, loyal",
-        "Gemini": "Curious, witty, adaptable",
-        "Cancer": "Sensitive, nurturing, protective",
-        "Leo": "Confident, creative, proud",
-        "Virgo": "Analytical, practical, diligent",
-        "Libra": "Charming, balanced, fair-minded",
-        "Scorpio": "Intense, intuitive, passionate",
-        "Sagittarius": "Adventurous, optimistic, independent",
-        "Capricorn": "Disciplined, ambitious, wise",
-        "Aquarius": "Innovative, independent, humanitarian",
-        "Pisces": "Compassionate, dreamy, artistic"
-    }
-    return traits.get(sign, "")
+# TRUSTED_RESPONSES=true: list endpoints render Supabase rows straight to JSON instead of
+# validating and re-serializing every row through its response_model
+TRUSTED_RESPONSES = os.getenv("TRUSTED_RESPONSES", "false").lower() == "true"
+
+def list_response(rows: List[Dict[str, Any]], response: Optional[Response] = None):
+    """Return rows for a list endpoint.
+
+    In trusted mode the rows are rendered as-is; returning a Response makes FastAPI skip the
+    response_model pass, while the model still documents the shape in OpenAPI. The rows are
+    trusted to match it, so columns the model doesn't declare are passed through rather than
+    dropped. Headers already set on the endpoint's `response` are carried over.
+    """
+    if not TRUSTED_RESPONSES:
+        return rows
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return FastJSONResponse(rows, headers=headers)
 
 @app.get("/")
 def read_root():
@@ -184,9 +253,27 @@ def serialize_for_db(data):
         return data.isoformat()
     elif isinstance(data, UUID):
         return str(data)
+    elif isinstance(data, Decimal):
+        return str(data)
     else:
         return data
 
+def raise_for_missing_reference(e: Exception, not_found: Dict[str, str]):
+    """Turn a foreign key violation (Postgres 23503) on insert into the endpoint's 404.
+
+    Inserts rely on the foreign keys instead of looking the referenced rows up first;
+    not_found maps the FK column to the 404 detail, e.g. {"user_id": "User not found"}.
+    """
+    if getattr(e, "code", None) != "23503" and "23503" not in str(e):
+        return
+    details = f"{getattr(e, 'details', None) or ''} {getattr(e, 'message', None) or ''} {e}"
+    for column, detail in not_found.items():
+        if f"({column})" in details or f"_{column}_fkey" in details:
+            raise HTTPException(status_code=404, detail=detail)
+    raise HTTPException(status_code=404, detail=next(iter(not_found.values())))
+
+WELCOME_MESSAGE = "Welcome to Astro! I'm your personal cosmic companion. How can I assist you today?"
+
 @app.post("/users", response_model=UserResponse, status_code=201)
 def create_user(user: UserCreate):
     # Convert model to dict and handle serialization
@@ -197,66 +284,17 @@ def create_user(user: UserCreate):
         if "id" in user_data:
             del user_data["id"]
         
-        # Try to insert the user data
-        result = supabase.table('users').insert(user_data).execute()
+        # Insert the user, their welcome conversation and welcome message in one transaction
+        created_user = sb.create_user_with_welcome(supabase, user_data, WELCOME_MESSAGE)
         
-        if not result.data:
+        if not created_user:
             raise HTTPException(status_code=500, detail="Failed to create user")
 
-        # Create a default conversation for the user
-        try:
-            user_id = result.data[0]["id"]
-            logger.info(f"Creating default conversation for user: {user_id}")
-            
-            conversation_data = {
-                "id": str(uuid4()),
-                "user_id": user_id,
-                "title": "Welcome",
-                "created_at": datetime.datetime.now().isoformat(),
-                "updated_at": datetime.datetime.now().isoformat()
-            }
-            
-            logger.info(f"Conversation data: {conversation_data}")
-            
-            # Save conversation to database
-            try:
-                conversation_result = supabase.table('conversations').insert(conversation_data).execute()
-                logger.info(f"Conversation creation result: {conversation_result.data}")
-                
-                if conversation_result.data:
-                    logger.info(f"Created default conversation for user: {user_id}")
-                    
-                    # Create a welcome message from the assistant
-                    welcome_message = {
-                        "id": str(uuid4()),
-                        "conversation_id": conversation_data["id"],
-                        "content": "Welcome to Astro! I'm your personal cosmic companion. How can I assist you today?",
-                        "role": "assistant",
-                        "timestamp": datetime.datetime.now().isoformat()
-                    }
-                    
-                    logger.info(f"Welcome message data: {welcome_message}")
-                    
-                    # Save welcome message to database
-                    try:
-                        message_result = supabase.table('messages').insert(welcome_message).execute()
-                        logger.info(f"Message creation result: {message_result.data}")
-                        
-                        if message_result.data:
-                            logger.info(f"Created welcome message for user: {user_id}")
-                    except Exception as msg_error:
-                        logger.error(f"Error creating welcome message: {str(msg_error)}")
-            except Exception as conv_error:
-                logger.error(f"Error creating conversation: {str(conv_error)}")
-        except Exception as e:
-            # Log the error but don't fail the user creation
-            logger.error(f"Error creating default conversation: {str(e)}")
-            logger.error(f"Error details: {type(e).__name__}")
-            import traceback
-            logger.error(traceback.format_exc())
-
-        logger.info(f"Created user: {result.data[0]}")
-        return result.data[0]
+        logger.info("Created user: %s", created_user.get("id"))
+        payload_logger.debug("Created user row: %s", Truncated(created_user))
+        return created_user
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating user: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -283,39 +321,91 @@ def get_user(user_id: UUID):
         logger.error(f"Error getting user: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Astro Profile endpoints
+@app.post("/astro-profiles/generate", response_model=AstroProfileResponse, status_code=201)
+def generate_astro_profile(request: AstroProfileRequest):
+    try:
+        try:
+            user_result = supabase.table('users').select("*").eq("id", str(request.user_id)).single().execute()
+            if not user_result.data:
+                raise HTTPException(status_code=404, detail="User not found")
+        except HTTPException:
+            raise
+        except Exception as e:
+            if "no rows" in str(e).lower() or "0 rows" in str(e).lower() or "PGRST116" in str(e):
+                raise HTTPException(status_code=404, detail="User not found")
+            raise
+        user = user_result.data
+
+        try:
+            birth_tz = pytz.timezone(request.timezone) if request.timezone else pytz.utc
+        except pytz.UnknownTimeZoneError:
+            raise HTTPException(status_code=400, detail=f"Unknown timezone: {request.timezone}")
+
+        # Without a birth time, use noon and skip houses/rising sign, which change every few minutes
+        birth_date = datetime.date.fromisoformat(str(user["birth_date"]))
+        birth_time = user.get("birth_time")
+        local_birth = datetime.datetime.combine(
+            birth_date,
+            datetime.time.fromisoformat(str(birth_time)) if birth_time else datetime.time(12, 0)
+        )
+
+        try:
+            chart = compute_natal_chart(
+                birth_tz.localize(local_birth),
+                latitude=request.latitude if birth_time else None,
+                longitude=request.longitude if birth_time else None,
+                house_system=request.house_system
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        profile = chart.to_profile()
+        sb.save_astro_profile(supabase, str(request.user_id), profile)
+
+        logger.info("Generated astro profile for user: %s", request.user_id)
+        return {"user_id": request.user_id, **profile}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating astro profile: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/astro-profiles/{user_id}", response_model=AstroProfileResponse)
+def get_astro_profile(user_id: UUID):
+    try:
+        try:
+            profile = sb.get_astro_profile(supabase, str(user_id))
+            if not profile:
+                raise HTTPException(status_code=404, detail="Astro profile not found")
+            return profile
+        except HTTPException:
+            raise
+        except Exception as e:
+            if "no rows" in str(e).lower() or "0 rows" in str(e).lower() or "PGRST116" in str(e):
+                raise HTTPException(status_code=404, detail="Astro profile not found")
+            raise
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting astro profile: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Mood endpoints
 @app.get("/moods", response_model=List[MoodResponse])
 def get_moods():
     try:
-        result = supabase.table('moods').select("*").execute()
-        return result.data
+        return list_response(reference_cache.get_all('moods'))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/user-moods", response_model=UserMoodResponse, status_code=201)
 def create_user_mood(mood: UserMoodCreate):
     try:
-        # Check if user exists
-        try:
-            user_result = supabase.table('users').select("*").eq("id", str(mood.user_id)).single().execute()
-            if not user_result.data:
-                raise HTTPException(status_code=404, detail="User not found")
-        except Exception as e:
-            # Check if this is a row-level security error or no rows error
-            if "row-level security" in str(e).lower() or "42501" in str(e) or "no rows" in str(e).lower():
-                raise HTTPException(status_code=404, detail="User not found")
-            raise
-        
         # Check if mood exists
-        try:
-            mood_result = supabase.table('moods').select("*").eq("id", str(mood.mood_id)).single().execute()
-            if not mood_result.data:
-                raise HTTPException(status_code=404, detail="Mood not found")
-        except Exception as e:
-            # Check if this is a row-level security error or no rows error
-            if "row-level security" in str(e).lower() or "42501" in str(e) or "no rows" in str(e).lower():
-                raise HTTPException(status_code=404, detail="Mood not found")
-            raise
+        mood_row = reference_cache.get_by_id('moods', mood.mood_id)
+        if not mood_row:
+            raise HTTPException(status_code=404, detail="Mood not found")
         
         # Create user mood entry
         mood_data = mood.dict()
@@ -334,9 +424,13 @@ def create_user_mood(mood: UserMoodCreate):
             
             # Return with mood details included
             response_data = result.data[0]
-            response_data["mood"] = mood_result.data
+            response_data["mood"] = mood_row
             return response_data
+        except HTTPException:
+            raise
         except Exception as e:
+            # The user is checked by the foreign key rather than a lookup beforehand
+            raise_for_missing_reference(e, {"user_id": "User not found", "mood_id": "Mood not found"})
             # Check if this is a row-level security error
             if "row-level security" in str(e).lower() or "42501" in str(e):
                 # Try to authenticate first
@@ -357,7 +451,7 @@ def create_user_mood(mood: UserMoodCreate):
                     
                     # Return with mood details included
                     response_data = anon_result.data[0]
-                    response_data["mood"] = mood_result.data
+                    response_data["mood"] = mood_row
                     return response_data
                 except Exception as inner_e:
                     logger.error(f"Error creating user mood with anonymous client: {str(inner_e)}")
@@ -390,7 +484,7 @@ def get_user_moods(user_id: UUID, limit: int = 10):
                 item["mood"] = mood_data
                 response_data.append(item)
                 
-            return response_data
+            return list_response(response_data)
         except Exception as e:
             # Check if this is a "no rows" error
             if "no rows" in str(e).lower() or "0 rows" in str(e).lower():
@@ -410,39 +504,36 @@ def get_user_moods(user_id: UUID, limit: int = 10):
 @app.get("/companion-energies", response_model=List[CompanionEnergyResponse])
 def get_companion_energies():
     try:
-        result = supabase.table('companion_energies').select("*").execute()
-        return result.data
+        return list_response(reference_cache.get_all('companion_energies'))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/user-companion-energies", response_model=UserCompanionEnergyResponse, status_code=201)
-def set_user_companion_energy(energy: UserCompanionEnergyCreate):
+async def set_user_companion_energy(energy: UserCompanionEnergyCreate):
     try:
-        # Check if user exists
-        user_result = supabase.table('users').select("*").eq("id", str(energy.user_id)).single().execute()
-        if not user_result.data:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Check if companion energy exists
-        energy_result = supabase.table('companion_energies').select("*").eq("id", str(energy.companion_energy_id)).single().execute()
-        if not energy_result.data:
+        # Check if companion energy exists; in a thread, since a cache miss queries Supabase synchronously
+        energy_row = await asyncio.to_thread(reference_cache.get_by_id, 'companion_energies', energy.companion_energy_id)
+        if not energy_row:
             raise HTTPException(status_code=404, detail="Companion energy not found")
         
-        # Deactivate any existing active companion energies for this user
-        supabase.table('user_companion_energies').update({"is_active": False}).eq("user_id", str(energy.user_id)).eq("is_active", True).execute()
+        energy_data = serialize_for_db(energy.dict())
+        energy_data["id"] = str(uuid4())
         
-        # Create new user companion energy entry
-        energy_data = energy.dict()
-        energy_data["id"] = uuid4()
-        
-        result = supabase.table('user_companion_energies').insert(energy_data).execute()
-        if not result.data:
+        # Deactivating the previous entries and inserting the new one is one transaction; the
+        # insert's foreign key checks the user
+        try:
+            response_data = await sb.set_user_companion_energy(async_supabase, energy_data)
+        except Exception as e:
+            raise_for_missing_reference(e, {"user_id": "User not found", "companion_energy_id": "Companion energy not found"})
+            raise
+        if not response_data:
             raise HTTPException(status_code=500, detail="Failed to set user companion energy")
         
         # Return with companion energy details included
-        response_data = result.data[0]
-        response_data["companion_energy"] = energy_result.data
+        response_data["companion_energy"] = energy_row
         return response_data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -470,75 +561,58 @@ def get_user_companion_energy(user_id: UUID):
 @app.get("/cosmic-energy-types", response_model=List[CosmicEnergyTypeResponse])
 def get_cosmic_energy_types():
     try:
-        result = supabase.table('cosmic_energy_types').select("*").execute()
-        return result.data
+        return list_response(reference_cache.get_all('cosmic_energy_types'))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/cosmic-energy-cards", response_model=List[CosmicEnergyCardResponse])
 def get_cosmic_energy_cards(zodiac_sign: Optional[str] = None, date: Optional[str] = None):
     try:
-        query = supabase.table('cosmic_energy_cards').select("*, cosmic_energy_types(*)")
-        
-        # Apply filters if provided
-        if zodiac_sign:
-            query = query.eq("zodiac_sign", zodiac_sign)
-        
-        if date:
-            query = query.eq("date", date)
-        else:
-            # Default to today's date
-            today = datetime.date.today().isoformat()
-            query = query.eq("date", today)
-        
-        result = query.execute()
-        
-        # Format response to match our model
-        response_data = []
-        for item in result.data:
-            energy_type_data = item.pop("cosmic_energy_types", {})
-            item["energy_type"] = energy_type_data
-            response_data.append(item)
-            
-        return response_data
+        # Default to today's date
+        card_date = datetime.date.fromisoformat(date) if date else datetime.date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date, expected YYYY-MM-DD")
+
+    try:
+        # Served as pre-serialized bytes; the response_model still documents the shape
+        return Response(content=cosmic_card_cache.get(zodiac_sign, card_date), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/user-cosmic-energy-cards", response_model=UserCosmicEnergyCardResponse, status_code=201)
-def mark_card_as_read(card: UserCosmicEnergyCardCreate):
+async def mark_card_as_read(card: UserCosmicEnergyCardCreate):
     try:
-        # Check if user exists
-        user_result = supabase.table('users').select("*").eq("id", str(card.user_id)).single().execute()
+        # Check the user and the card concurrently; the card row is returned with the response
+        user_result, card_result = await asyncio.gather(
+            async_supabase.table('users').select("id").eq("id", str(card.user_id)).limit(1).execute(),
+            async_supabase.table('cosmic_energy_cards').select("*").eq("id", str(card.card_id)).limit(1).execute()
+        )
         if not user_result.data:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        # Check if card exists
-        card_result = supabase.table('cosmic_energy_cards').select("*").eq("id", str(card.card_id)).single().execute()
         if not card_result.data:
             raise HTTPException(status_code=404, detail="Cosmic energy card not found")
         
-        # Create or update user card entry
-        card_data = card.dict()
-        card_data["id"] = uuid4()
-        
-        result = supabase.table('user_cosmic_energy_cards').insert(card_data).execute()
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to mark card as read")
-        
+        # The read mark is queued rather than written inline; the row is built here so the
+        # response doesn't wait on the insert
+        card_data = serialize_for_db(card.dict())
+        card_data["id"] = str(uuid4())
+        card_data["created_at"] = datetime.datetime.now().isoformat()
+        write_behind.insert('user_cosmic_energy_cards', card_data)
+
         # Return with card details included
-        response_data = result.data[0]
-        response_data["card"] = card_result.data
-        return response_data
+        return {**card_data, "card": card_result.data[0]}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/conversations/{user_id}", response_model=List[ConversationResponse])
 def get_user_conversations(user_id: UUID):
     try:
-        logger.info(f"Getting conversations for user: {user_id}")
+        logger.debug("Getting conversations for user: %s", user_id)
         result = supabase.table('conversations').select("*").eq("user_id", str(user_id)).order("updated_at", desc=True).execute()
-        logger.info(f"Found {len(result.data)} conversations for user {user_id}")
-        return result.data
+        logger.debug("Found %d conversations for user %s", len(result.data), user_id)
+        return list_response(result.data)
     except Exception as e:
         logger.error(f"Error in get_user_conversations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -571,169 +645,387 @@ def create_conversation(conversation: ConversationCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 # Message endpoints
+async def load_conversation_memory(conversation_id: str, exclude_message_id: Optional[str] = None):
+    """Hydrate chat memory from the messages table on a miss (new worker, restart, idle expiry).
+
+    In steady state memory already holds the recent turns and no query is made.
+    """
+    if await memory_call(memory_manager, memory_manager.get_memory, conversation_id):
+        return
+
+    history_result = await async_supabase.table('messages').select(
+        "id, role, content"
+    ).eq("conversation_id", conversation_id).order("timestamp", desc=True).limit(memory_manager.max_memory + 1).execute()
+
+    # Latest N, oldest first, without the message that is being answered right now
+    history = [msg for msg in history_result.data or [] if msg["id"] != exclude_message_id][:memory_manager.max_memory]
+
+    # Replaces rather than appends, so two concurrent misses on the same conversation (double
+    # submit, stream plus POST) don't both add the history
+    await memory_call(memory_manager, memory_manager.replace_memory, conversation_id, [
+        ("ai" if msg["role"] == "assistant" else msg["role"], msg["content"]) for msg in reversed(history)
+    ])
+
+async def fetch_chat_context(conversation_id: str, user_id: str, message_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Load the user row, stored astro profile and active companion energy concurrently,
+    hydrating the conversation's chat memory alongside if it isn't in memory yet.
+
+    Returns None when the user can't be found, in which case no AI reply is generated.
+    """
+    with span("context"):
+        user_result, profile_result, energy_result, memory_result = await asyncio.gather(
+            async_supabase.table('users').select("*").eq("id", user_id).execute(),
+            async_supabase.table('astro_profiles').select(
+                "sun_sign, moon_sign, rising_sign"
+            ).eq("user_id", user_id).execute(),
+            async_supabase.table('user_companion_energies').select(
+                "*, companion_energies(*)"
+            ).eq("user_id", user_id).eq("is_active", True).execute(),
+            load_conversation_memory(conversation_id, exclude_message_id=message_id),
+            return_exceptions=True
+        )
+
+    if isinstance(user_result, Exception):
+        raise user_result
+    if not user_result.data:
+        return None
+
+    user = user_result.data[0]
+
+    # Prefer the stored natal profile; fall back to the birth-date sun sign if there isn't one
+    profile = {}
+    if isinstance(profile_result, Exception):
+        logger.warning(f"Error getting astro profile: {str(profile_result)}")
+    elif profile_result.data:
+        profile = profile_result.data[0]
+    zodiac_sign = profile.get("sun_sign") or get_zodiac_sign(user["birth_date"])
+    zodiac_traits = get_zodiac_traits(zodiac_sign)
+
+    # Get user's active companion energy
+    companion_energy = "Wise & Calm"
+    if isinstance(energy_result, Exception):
+        logger.warning(f"Error getting companion energy: {str(energy_result)}")
+    elif energy_result.data and len(energy_result.data) > 0:
+        companion_energy = energy_result.data[0]["companion_energies"]["name"]
+
+    if isinstance(memory_result, Exception):
+        logger.warning(f"Error getting conversation history: {str(memory_result)}")
+
+    return {
+        "user": user,
+        "zodiac_sign": zodiac_sign,
+        "zodiac_traits": zodiac_traits,
+        "moon_sign": profile.get("moon_sign"),
+        "rising_sign": profile.get("rising_sign"),
+        "companion_energy": companion_energy,
+    }
+
+def build_chat_context_text(chat_context: Dict[str, Any]) -> str:
+    # Prepare context for AI; recent turns come from chat memory, not from here
+    context = f"User's zodiac sign: {chat_context['zodiac_sign']}\nZodiac traits: {chat_context['zodiac_traits']}\n"
+    if chat_context.get("moon_sign"):
+        context += f"Moon sign: {chat_context['moon_sign']}\n"
+    if chat_context.get("rising_sign"):
+        context += f"Rising sign: {chat_context['rising_sign']}\n"
+    context += f"Companion energy: {chat_context['companion_energy']}\n"
+    return context
+
+def chat_cache_scope(chat_context: Dict[str, Any]) -> tuple:
+    # Everything user-specific in build_chat_context_text; cached replies are only shared
+    # between users with the same values
+    return (
+        chat_context["zodiac_sign"], chat_context.get("moon_sign"),
+        chat_context.get("rising_sign"), chat_context["companion_energy"]
+    )
+
+async def get_conversation(conversation_id: str) -> Dict[str, Any]:
+    # Check if conversation exists
+    try:
+        conversation_result = await conversation_reads.ado(
+            conversation_id,
+            lambda: async_supabase.table('conversations').select("*").eq("id", conversation_id).execute()
+        )
+        
+        # Check if we got any data back
+        if not conversation_result.data or len(conversation_result.data) == 0:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        
+        # Use the first conversation found
+        return conversation_result.data[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        if "no rows" in str(e).lower() or "0 rows" in str(e).lower() or "PGRST116" in str(e):
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        else:
+            raise
+
+def build_message_row(message: MessageSendRequest) -> Dict[str, Any]:
+    # Serialize the data for Supabase
+    message_data = serialize_for_db(message.dict())
+    if "id" not in message_data:
+        message_data["id"] = str(uuid4())
+    message_data["timestamp"] = datetime.datetime.now().isoformat()
+    return message_data
+
+def build_assistant_row(conversation_id: str, ai_response: str) -> Dict[str, Any]:
+    return {
+        "id": str(uuid4()),
+        "conversation_id": conversation_id,
+        "content": ai_response,
+        "role": "assistant",
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+
+async def save_chat_turn(conversation_id: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Persist the turn's messages in one round trip, all or nothing; the conversation's
+    updated_at is touched through the write-behind queue"""
+    try:
+        with span("persist"):
+            saved = await sb.record_chat_turn(async_supabase, conversation_id, messages)
+    except Exception as e:
+        logger.error(f"Error saving chat turn: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to send message")
+    # Coalesced per conversation, so a burst of turns becomes one update
+    write_behind.update('conversations', {"id": conversation_id}, {"updated_at": messages[-1]["timestamp"]})
+    return saved
+
 @app.post("/messages", response_model=MessageResponse, status_code=201)
-def send_message(message: MessageSendRequest):
+async def send_message(message: MessageSendRequest):
     try:
-        # Serialize the data for Supabase
-        message_data = serialize_for_db(message.dict())
+        conversation_id = str(message.conversation_id)
+        conversation = await get_conversation(conversation_id)
+        user_message = build_message_row(message)
         
-        # Check if conversation exists
+        # Only user messages get an AI response
+        if message.role != "user":
+            return (await save_chat_turn(conversation_id, [user_message]))[0]
+
+        user_id = conversation["user_id"]
         try:
-            conversation_result = supabase.table('conversations').select("*").eq("id", str(message.conversation_id)).execute()
-            
-            # Check if we got any data back
-            if not conversation_result.data or len(conversation_result.data) == 0:
-                raise HTTPException(status_code=404, detail="Conversation not found")
-            
-            # Use the first conversation found
-            conversation = conversation_result.data[0]
+            chat_context = await fetch_chat_context(conversation_id, user_id, message_id=user_message["id"])
         except Exception as e:
-            if "no rows" in str(e).lower() or "0 rows" in str(e).lower() or "PGRST116" in str(e):
-                raise HTTPException(status_code=404, detail="Conversation not found")
-            else:
-                raise
-        
-        # Create message
-        if "id" not in message_data:
-            message_data["id"] = str(uuid4())
-        message_data["timestamp"] = datetime.datetime.now().isoformat()
-        
-        # Save message to database
-        result = supabase.table('messages').insert(message_data).execute()
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to send message")
-        
-        # If this is a user message, generate AI response
+            logger.error(f"Error processing user message: {str(e)}")
+            chat_context = None
+
+        if chat_context is None:
+            # Continue without AI response
+            return (await save_chat_turn(conversation_id, [user_message]))[0]
+
+        # Classify message type
+        with span("classify"):
+            message_type = classify_message(message.content)
+
+        # Generate AI response
+        context_text = build_chat_context_text(chat_context)
+
+        logger.debug("Generating %s response for conversation %s", message_type, conversation_id)
+        payload_logger.debug("User message: %s", Truncated(message.content))
+        payload_logger.debug("Chat context: %s", Truncated(context_text))
+
+        try:
+            ai_response = await multi_prompt_manager.arun(
+                memory_key=conversation_id,
+                user_message=message.content,
+                memory_manager=memory_manager,
+                force_type=message_type,
+                context=context_text,
+                cache_scope=chat_cache_scope(chat_context)
+            )
+            payload_logger.debug("AI response: %s", Truncated(ai_response))
+        except Exception as e:
+            logger.error(f"Error generating AI response: {str(e)}")
+            ai_response = "I'm sorry, I couldn't generate a response at this time. Please try again later."
+
+        # Save both messages of the turn together
+        saved_user_message, ai_message = await save_chat_turn(
+            conversation_id,
+            [user_message, build_assistant_row(conversation_id, ai_response)]
+        )
+
+        # Return the AI response with the user message
+        saved_user_message["assistant_response"] = ai_message
+        return saved_user_message
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error sending message: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data, default=json_default).decode()}\n\n"
+
+@app.post("/messages/stream", status_code=200)
+async def stream_message(message: MessageSendRequest):
+    """Like POST /messages, but streams the assistant reply as server-sent events.
+
+    Events: `message` (the user message), `token` (one per chunk of the reply), then `done`
+    (the saved assistant message, or null when no reply was generated) or `error` if the turn
+    couldn't be saved. Both messages are saved in one round trip after the stream ends, and
+    chat memory gets the same reply, including when the client disconnects mid-stream.
+    """
+    try:
+        conversation_id = str(message.conversation_id)
+        conversation = await get_conversation(conversation_id)
+        user_message = build_message_row(message)
+
+        chat_context = None
         if message.role == "user":
-            # Get user details for context
-            user_id = conversation["user_id"]
             try:
-                user_result = supabase.table('users').select("*").eq("id", user_id).execute()
-                
-                if user_result.data and len(user_result.data) > 0:
-                    user = user_result.data[0]
-                    zodiac_sign = get_zodiac_sign(user["birth_date"])
-                    zodiac_traits = get_zodiac_traits(zodiac_sign)
-                    
-                    # Get user's active companion energy
-                    try:
-                        energy_result = supabase.table('user_companion_energies').select(
-                            "*, companion_energies(*)"
-                        ).eq("user_id", user_id).eq("is_active", True).execute()
-                        
-                        companion_energy = "Wise & Calm"
-                        if energy_result.data and len(energy_result.data) > 0:
-                            companion_energy = energy_result.data[0]["companion_energies"]["name"]
-                    except Exception as e:
-                        logger.warning(f"Error getting companion energy: {str(e)}")
-                        companion_energy = "Wise & Calm"
-                    
-                    # Prepare context for AI
-                    context = f"User's zodiac sign: {zodiac_sign}\nZodiac traits: {zodiac_traits}\nCompanion energy: {companion_energy}\n"
-                    
-                    # Get conversation history
-                    try:
-                        history_result = supabase.table('messages').select("*").eq("conversation_id", str(message.conversation_id)).order("timestamp").limit(10).execute()
-                        history = history_result.data if history_result.data else []
-                    except Exception as e:
-                        logger.warning(f"Error getting conversation history: {str(e)}")
-                        history = []
-                    
-                    # Format history for the AI
-                    history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
-                    
-                    # Classify message type
-                    message_type = classify_message(message.content)
-                    
-                    # Generate AI response
-                    enhanced_user_message = f"{context}\nConversation history:\n{history_text}\nUser message: {message.content}"
-                    
-                    logger.info(f"Generating AI response for message: {message.content}")
-                    logger.info(f"Message type: {message_type}")
-                    logger.info(f"Enhanced user message: {enhanced_user_message}")
-                    
-                    try:
-                        ai_response = multi_prompt_manager.run(
-                            user_id=user_id,
-                            user_message=enhanced_user_message,
-                            memory_manager=memory_manager,
-                            force_type=message_type
-                        )
-                        logger.info(f"AI response generated: {ai_response}")
-                    except Exception as e:
-                        logger.error(f"Error generating AI response: {str(e)}")
-                        ai_response = "I'm sorry, I couldn't generate a response at this time. Please try again later."
-                    
-                    # Save AI response
-                    ai_message = {
-                        "id": str(uuid4()),
-                        "conversation_id": str(message.conversation_id),
-                        "content": ai_response,
-                        "role": "assistant",
-                        "timestamp": datetime.datetime.now().isoformat()
-                    }
-                    
-                    try:
-                        logger.info(f"Saving AI response to database: {ai_message}")
-                        ai_result = supabase.table('messages').insert(ai_message).execute()
-                        logger.info(f"AI response saved: {ai_result.data}")
-                    except Exception as e:
-                        logger.error(f"Error saving AI response: {str(e)}")
-                    
-                    # Update conversation timestamp
-                    try:
-                        supabase.table('conversations').update({"updated_at": datetime.datetime.now().isoformat()}).eq("id", str(message.conversation_id)).execute()
-                    except Exception as e:
-                        logger.error(f"Error updating conversation timestamp: {str(e)}")
-                    
-                    # Store the AI response to return it later
-                    return_data = result.data[0]
-                    return_data["assistant_response"] = ai_message
+                chat_context = await fetch_chat_context(conversation_id, conversation["user_id"], message_id=user_message["id"])
             except Exception as e:
                 logger.error(f"Error processing user message: {str(e)}")
-                # Continue without AI response
-        
-        # Check if we have an assistant response to return
-        if "assistant_response" in locals():
-            return return_data
-        else:
-            return result.data[0]
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error sending message: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def event_stream():
+        parts = []
+        saved_rows = None
+        try:
+            yield sse_event("message", user_message)
+
+            if chat_context is not None:
+                with span("classify"):
+                    message_type = classify_message(message.content)
+                context_text = build_chat_context_text(chat_context)
+
+                try:
+                    async for token in multi_prompt_manager.astream(
+                        memory_key=conversation_id,
+                        user_message=message.content,
+                        memory_manager=memory_manager,
+                        force_type=message_type,
+                        context=context_text,
+                        cache_scope=chat_cache_scope(chat_context),
+                        remember=False
+                    ):
+                        parts.append(token)
+                        yield sse_event("token", {"token": token})
+                except Exception as e:
+                    logger.error(f"Error streaming AI response: {str(e)}")
+                    if not parts:
+                        fallback = "I'm sorry, I couldn't generate a response at this time. Please try again later."
+                        parts.append(fallback)
+                        yield sse_event("token", {"token": fallback})
+        finally:
+            # Persist and remember once the stream has finished, with whatever reply was sent;
+            # shielded so a client disconnect doesn't lose the turn
+            reply = "".join(parts)
+            rows = [user_message]
+            if reply:
+                rows.append(build_assistant_row(conversation_id, reply))
+
+            async def persist():
+                if reply:
+                    try:
+                        await multi_prompt_manager.aremember(conversation_id, message.content, reply, memory_manager)
+                    except Exception as e:
+                        logger.error(f"Error updating chat memory: {str(e)}")
+                return await save_chat_turn(conversation_id, rows)
+
+            try:
+                saved_rows = await asyncio.shield(asyncio.ensure_future(persist()))
+            except Exception:
+                saved_rows = None
+
+        if saved_rows is None:
+            yield sse_event("error", {"detail": "Failed to send message"})
+        else:
+            yield sse_event("done", saved_rows[1] if len(saved_rows) > 1 else None)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+MESSAGE_PAGE_MAX = 200
+
+def encode_message_cursor(message: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(f"{message['timestamp']}|{message['id']}".encode()).decode()
+
+def decode_message_cursor(cursor: str):
+    try:
+        timestamp, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        datetime.datetime.fromisoformat(timestamp)
+        return timestamp, str(UUID(message_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @app.get("/messages/{conversation_id}", response_model=List[MessageResponse])
-def get_conversation_messages(conversation_id: UUID):
+def get_conversation_messages(
+    conversation_id: UUID,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MESSAGE_PAGE_MAX),
+    before: Optional[str] = None,
+    after: Optional[str] = None
+):
+    """One page of a conversation, oldest first.
+
+    Without a cursor this is the latest `limit` messages. Pass the X-Prev-Cursor header back
+    as `before` to page towards older messages, or X-Next-Cursor as `after` to fetch newer ones.
+    Pages are keyed on (timestamp, id), so deep pages cost the same as the first.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
     try:
-        result = supabase.table('messages').select("*").eq("conversation_id", str(conversation_id)).order("timestamp").execute()
-        return result.data
+        query = supabase.table('messages').select("*").eq("conversation_id", str(conversation_id))
+
+        if after:
+            timestamp, message_id = decode_message_cursor(after)
+            query = query.or_(f'timestamp.gt."{timestamp}",and(timestamp.eq."{timestamp}",id.gt.{message_id})')
+            result = query.order("timestamp").order("id").limit(limit + 1).execute()
+            rows = result.data or []
+            # Everything up to the cursor is older than this page
+            has_more_older = True
+            page = rows[:limit]
+        else:
+            if before:
+                timestamp, message_id = decode_message_cursor(before)
+                query = query.or_(f'timestamp.lt."{timestamp}",and(timestamp.eq."{timestamp}",id.lt.{message_id})')
+            result = query.order("timestamp", desc=True).order("id", desc=True).limit(limit + 1).execute()
+            rows = result.data or []
+            has_more_older = len(rows) > limit
+            page = list(reversed(rows[:limit]))
+
+        if page:
+            if has_more_older:
+                response.headers["X-Prev-Cursor"] = encode_message_cursor(page[0])
+            # Always handed out so clients can poll for messages newer than this page
+            response.headers["X-Next-Cursor"] = encode_message_cursor(page[-1])
+        elif before or after:
+            response.headers["X-Next-Cursor" if after else "X-Prev-Cursor"] = after or before
+        return list_response(page, response)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting conversation messages: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Subscription endpoints
 @app.post("/subscriptions", response_model=SubscriptionResponse, status_code=201)
-def create_subscription(subscription: SubscriptionCreate):
+async def create_subscription(subscription: SubscriptionCreate):
     try:
-        # Check if user exists
-        user_result = supabase.table('users').select("*").eq("id", str(subscription.user_id)).single().execute()
-        if not user_result.data:
-            raise HTTPException(status_code=404, detail="User not found")
+        subscription_data = serialize_for_db(subscription.dict())
+        subscription_data["id"] = str(uuid4())
         
-        # Create subscription
-        subscription_data = subscription.dict()
-        subscription_data["id"] = uuid4()
-        
-        result = supabase.table('subscriptions').insert(subscription_data).execute()
-        if not result.data:
+        # The insert and the user's premium flag are one transaction; the insert's foreign key
+        # checks the user
+        try:
+            result = await sb.create_subscription(async_supabase, subscription_data)
+        except Exception as e:
+            raise_for_missing_reference(e, {"user_id": "User not found"})
+            raise
+        if not result:
             raise HTTPException(status_code=500, detail="Failed to create subscription")
         
-        # Update user premium status
-        supabase.table('users').update({"is_premium": True}).eq("id", str(subscription.user_id)).execute()
-        
-        return result.data[0]
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -741,7 +1033,7 @@ def create_subscription(subscription: SubscriptionCreate):
 def get_user_subscriptions(user_id: UUID):
     try:
         result = supabase.table('subscriptions').select("*").eq("user_id", str(user_id)).order("start_date", desc=True).execute()
-        return result.data
+        return list_response(result.data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,151 @@
+import datetime
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import swisseph as swe
+
+from astrology.zodiac import sign_from_longitude
+
+# Use the Swiss Ephemeris data files when available; otherwise swisseph falls back to
+# its built-in Moshier ephemeris, which is accurate to well under a degree
+if os.getenv("EPHE_PATH"):
+    swe.set_ephe_path(os.getenv("EPHE_PATH"))
+
+PLANETS = {
+    "sun": swe.SUN,
+    "moon": swe.MOON,
+    "mercury": swe.MERCURY,
+    "venus": swe.VENUS,
+    "mars": swe.MARS,
+    "jupiter": swe.JUPITER,
+    "saturn": swe.SATURN,
+    "uranus": swe.URANUS,
+    "neptune": swe.NEPTUNE,
+    "pluto": swe.PLUTO,
+}
+
+# Placidus, Koch, Whole Sign, Equal, Porphyry, Regiomontanus, Campanus
+HOUSE_SYSTEMS = {"P", "K", "W", "E", "O", "R", "C"}
+
+@dataclass(frozen=True)
+class PlanetPosition:
+    longitude: float
+    speed: float
+    sign: str
+    house: Optional[int] = None
+
+    @property
+    def retrograde(self) -> bool:
+        return self.speed < 0
+
+@dataclass(frozen=True)
+class NatalChart:
+    birth_utc: str
+    planets: Tuple[Tuple[str, PlanetPosition], ...]
+    house_system: str
+    house_cusps: Optional[Tuple[float, ...]] = None
+    ascendant: Optional[float] = None
+    midheaven: Optional[float] = None
+
+    def planet(self, name: str) -> PlanetPosition:
+        return dict(self.planets)[name]
+
+    def to_profile(self) -> Dict[str, Any]:
+        """Shape expected by supabase_helpers.save_astro_profile"""
+        return {
+            "sun_sign": self.planet("sun").sign,
+            "moon_sign": self.planet("moon").sign,
+            "rising_sign": sign_from_longitude(self.ascendant) if self.ascendant is not None else None,
+            "natal_chart": {
+                "birth_utc": self.birth_utc,
+                "house_system": self.house_system,
+                "planets": {
+                    name: {
+                        "longitude": round(position.longitude, 4),
+                        "sign": position.sign,
+                        "house": position.house,
+                        "retrograde": position.retrograde,
+                    }
+                    for name, position in self.planets
+                },
+                "houses": [round(cusp, 4) for cusp in self.house_cusps] if self.house_cusps else None,
+                "ascendant": round(self.ascendant, 4) if self.ascendant is not None else None,
+                "midheaven": round(self.midheaven, 4) if self.midheaven is not None else None,
+            },
+        }
+
+def to_utc(birth: datetime.datetime) -> datetime.datetime:
+    """Naive datetimes are taken to already be in UTC"""
+    if birth.tzinfo is None:
+        return birth.replace(tzinfo=datetime.timezone.utc)
+    return birth.astimezone(datetime.timezone.utc)
+
+def julian_day(utc: datetime.datetime) -> float:
+    hour = utc.hour + utc.minute / 60 + (utc.second + utc.microsecond / 1e6) / 3600
+    return swe.julday(utc.year, utc.month, utc.day, hour)
+
+def planet_longitudes(jd: float) -> Dict[str, Tuple[float, float]]:
+    """(longitude, speed) in degrees for every planet at a Julian day"""
+    positions = {}
+    for name, planet_id in PLANETS.items():
+        values, _ = swe.calc_ut(jd, planet_id, swe.FLG_SWIEPH | swe.FLG_SPEED)
+        positions[name] = (values[0], values[3])
+    return positions
+
+def house_of(longitude: float, cusps: Tuple[float, ...]) -> int:
+    for i in range(12):
+        start, end = cusps[i], cusps[(i + 1) % 12]
+        if (longitude - start) % 360 < (end - start) % 360:
+            return i + 1
+    return 12
+
+def compute_natal_chart(
+    birth: datetime.datetime,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    house_system: str = "P"
+) -> NatalChart:
+    """Planet positions, and houses/ascendant when the birth location is known.
+
+    Results are memoized on (UTC birth instant, latitude, longitude, house system).
+    """
+    if house_system not in HOUSE_SYSTEMS:
+        raise ValueError(f"Unsupported house system: {house_system}")
+    return _compute_natal_chart(to_utc(birth), latitude, longitude, house_system)
+
+@lru_cache(maxsize=4096)
+def _compute_natal_chart(
+    birth_utc: datetime.datetime,
+    latitude: Optional[float],
+    longitude: Optional[float],
+    house_system: str
+) -> NatalChart:
+    jd = julian_day(birth_utc)
+
+    cusps = ascendant = midheaven = None
+    if latitude is not None and longitude is not None:
+        house_cusps, ascmc = swe.houses(jd, latitude, longitude, house_system.encode())
+        # Older swisseph builds return 13 cusps with an unused first slot
+        cusps = tuple(house_cusps[-12:])
+        ascendant, midheaven = ascmc[0], ascmc[1]
+
+    planets = tuple(
+        (name, PlanetPosition(
+            longitude=lon,
+            speed=speed,
+            sign=sign_from_longitude(lon),
+            house=house_of(lon, cusps) if cusps else None,
+        ))
+        for name, (lon, speed) in planet_longitudes(jd).items()
+    )
+
+    return NatalChart(
+        birth_utc=birth_utc.isoformat(),
+        planets=planets,
+        house_system=house_system,
+        house_cusps=cusps,
+        ascendant=ascendant,
+        midheaven=midheaven,
+    )
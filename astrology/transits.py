@@ -0,0 +1,111 @@
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from astrology.natal_chart import PLANETS, julian_day, planet_longitudes
+from astrology.zodiac import sign_from_longitude
+
+PLANET_NAMES = tuple(PLANETS)
+
+# (name, exact angle, orb, weight) — harmonious aspects lift the day's score, hard ones lower it
+ASPECTS = (
+    ("conjunction", 0.0, 8.0, 0.5),
+    ("sextile", 60.0, 4.0, 1.0),
+    ("square", 90.0, 6.0, -1.0),
+    ("trine", 120.0, 6.0, 1.0),
+    ("opposition", 180.0, 8.0, -1.0),
+)
+ASPECT_NAMES = tuple(aspect[0] for aspect in ASPECTS)
+ASPECT_ANGLES = np.array([aspect[1] for aspect in ASPECTS])
+ASPECT_ORBS = np.array([aspect[2] for aspect in ASPECTS])
+ASPECT_WEIGHTS = np.array([aspect[3] for aspect in ASPECTS])
+
+def transit_positions(date: datetime.date) -> Dict[str, Dict[str, Any]]:
+    """Planet positions at noon UTC on a date; computed once per run, shared by every user"""
+    jd = julian_day(datetime.datetime.combine(date, datetime.time(12, 0), tzinfo=datetime.timezone.utc))
+    return {
+        name: {"longitude": round(lon, 4), "sign": sign_from_longitude(lon), "retrograde": speed < 0}
+        for name, (lon, speed) in planet_longitudes(jd).items()
+    }
+
+def natal_matrix(profiles: Sequence[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    """users x planets array of natal longitudes; planets missing from a chart are NaN"""
+    user_ids = []
+    natal = np.full((len(profiles), len(PLANET_NAMES)), np.nan)
+    for row, profile in enumerate(profiles):
+        user_ids.append(str(profile["user_id"]))
+        planets = (profile.get("natal_chart") or {}).get("planets") or {}
+        for col, name in enumerate(PLANET_NAMES):
+            position = planets.get(name)
+            if position and position.get("longitude") is not None:
+                natal[row, col] = position["longitude"]
+    return user_ids, natal
+
+def score_aspects(natal: np.ndarray, transit: np.ndarray):
+    """Find every transit-to-natal aspect for a block of users in one set of array operations.
+
+    natal is users x planets, transit is planets. Returns (user, natal planet, transit planet,
+    aspect) index arrays with the matching orbs, plus a per-user score.
+    """
+    # Angular separation in [0, 180] for every (user, natal planet, transit planet)
+    separation = np.abs((natal[:, :, None] - transit[None, None, :] + 180.0) % 360.0 - 180.0)
+
+    # aspects x users x planets x planets; NaN natal positions never compare true
+    deviation = np.abs(separation[None, ...] - ASPECT_ANGLES[:, None, None, None])
+    within_orb = deviation <= ASPECT_ORBS[:, None, None, None]
+
+    aspect_idx, user_idx, natal_idx, transit_idx = np.nonzero(within_orb)
+    orbs = deviation[aspect_idx, user_idx, natal_idx, transit_idx]
+
+    # Tighter aspects count for more
+    strength = ASPECT_WEIGHTS[aspect_idx] * (1.0 - orbs / ASPECT_ORBS[aspect_idx])
+    scores = np.bincount(user_idx, weights=strength, minlength=natal.shape[0])
+    return user_idx, natal_idx, transit_idx, aspect_idx, orbs, scores
+
+def mood_scores(scores: np.ndarray) -> np.ndarray:
+    """Map raw aspect scores onto the 1-10 mood scale"""
+    return np.clip(np.rint(5.5 + 4.5 * np.tanh(scores / 3.0)), 1, 10).astype(int)
+
+def daily_contexts(
+    profiles: Sequence[Dict[str, Any]],
+    date: datetime.date,
+    transits: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """daily_context rows (see supabase_helpers.save_daily_context) for a block of users"""
+    transits = transits or transit_positions(date)
+    transit = np.array([transits[name]["longitude"] for name in PLANET_NAMES])
+    user_ids, natal = natal_matrix(profiles)
+
+    user_idx, natal_idx, transit_idx, aspect_idx, orbs, scores = score_aspects(natal, transit)
+    moods = mood_scores(scores)
+
+    # Group the flat aspect hits per user, tightest first
+    order = np.lexsort((orbs, user_idx))
+    boundaries = np.searchsorted(user_idx[order], np.arange(len(user_ids) + 1))
+
+    date_str = date.isoformat()
+    contexts = []
+    for row, user_id in enumerate(user_ids):
+        aspects = [
+            {
+                "transit_planet": PLANET_NAMES[transit_idx[i]],
+                "natal_planet": PLANET_NAMES[natal_idx[i]],
+                "aspect": ASPECT_NAMES[aspect_idx[i]],
+                "orb": round(float(orbs[i]), 2),
+            }
+            for i in order[boundaries[row]:boundaries[row + 1]]
+        ]
+        summary = ", ".join(
+            f"{a['transit_planet'].capitalize()} {a['aspect']} natal {a['natal_planet'].capitalize()}"
+            for a in aspects[:3]
+        )
+        contexts.append({
+            "user_id": user_id,
+            "date": date_str,
+            "mood_score": int(moods[row]),
+            "transits": transits,
+            "aspects_today": aspects,
+            "summary": summary or None,
+        })
+    return contexts
@@ -0,0 +1,102 @@
+import datetime
+import logging
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Zodiac signs reference
+ZODIAC_SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+]
+
+ZODIAC_TRAITS = {
+    "Aries": "Bold, energetic, pioneering",
+    "Taurus": "Grounded, patient, loyal",
+    "Gemini": "Curious, witty, adaptable",
+    "Cancer": "Sensitive, nurturing, protective",
+    "Leo": "Confident, creative, proud",
+    "Virgo": "Analytical, practical, diligent",
+    "Libra": "Charming, balanced, fair-minded",
+    "Scorpio": "Intense, intuitive, passionate",
+    "Sagittarius": "Adventurous, optimistic, independent",
+    "Capricorn": "Disciplined, ambitious, wise",
+    "Aquarius": "Innovative, independent, humanitarian",
+    "Pisces": "Compassionate, dreamy, artistic"
+}
+
+# First (month, day) of each sun sign; anything before Jan 20 is still Capricorn
+_SIGN_STARTS = [
+    (1, 20, "Aquarius"), (2, 19, "Pisces"), (3, 21, "Aries"), (4, 20, "Taurus"),
+    (5, 21, "Gemini"), (6, 21, "Cancer"), (7, 23, "Leo"), (8, 23, "Virgo"),
+    (9, 23, "Libra"), (10, 23, "Scorpio"), (11, 22, "Sagittarius"), (12, 22, "Capricorn"),
+]
+
+# Day-of-year offsets for each month in a leap year, so Feb 29 gets its own slot
+_MONTH_OFFSETS = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+
+def _build_day_table():
+    table = []
+    sign = "Capricorn"
+    starts = {(month, day): name for month, day, name in _SIGN_STARTS}
+    for day_index in range(366):
+        day = datetime.date(2000, 1, 1) + datetime.timedelta(days=day_index)
+        sign = starts.get((day.month, day.day), sign)
+        table.append(ZODIAC_SIGNS.index(sign))
+    return table
+
+# Sign index for every day of a leap year
+_SIGN_BY_DAY = _build_day_table()
+_SIGN_NAMES_BY_DAY = tuple(ZODIAC_SIGNS[index] for index in _SIGN_BY_DAY)
+
+_SIGN_BY_DAY_NP = np.array(_SIGN_BY_DAY, dtype=np.int8)
+_MONTH_OFFSETS_NP = np.array(_MONTH_OFFSETS, dtype=np.int16)
+_SIGNS_NP = np.array(ZODIAC_SIGNS, dtype=object)
+_TRAITS_NP = np.array([ZODIAC_TRAITS[sign] for sign in ZODIAC_SIGNS], dtype=object)
+
+DateLike = Union[datetime.date, str]
+
+def _parse_date(text: str) -> datetime.date:
+    # fromisoformat is the fast path; strptime also takes unpadded dates like "2024-1-5"
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return datetime.datetime.strptime(text, "%Y-%m-%d").date()
+
+def get_zodiac_sign(birth_date: DateLike) -> str:
+    # Convert string to date object if needed
+    if isinstance(birth_date, str):
+        try:
+            birth_date = _parse_date(birth_date)
+        except ValueError as e:
+            logger.error(f"Error parsing birth date: {str(e)}")
+            # Default to Aries if we can't parse the date
+            return "Aries"
+
+    return _SIGN_NAMES_BY_DAY[_MONTH_OFFSETS[birth_date.month - 1] + birth_date.day - 1]
+
+def get_zodiac_traits(sign: str) -> str:
+    """Get traits for a zodiac sign"""
+    return ZODIAC_TRAITS.get(sign, "")
+
+def zodiac_signs(dates: Union[np.ndarray, Iterable[DateLike]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized sign and traits lookup for many dates at once.
+
+    Accepts a datetime64 array or any sequence of dates/ISO strings, and returns
+    (signs, traits) object arrays. Missing dates (NaT) default to Aries, like get_zodiac_sign.
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    missing = np.isnat(days)
+    months = days.astype("datetime64[M]")
+    month_index = months.astype(np.int64) % 12
+    day_of_month = (days - months).astype(np.int64)
+
+    sign_index = _SIGN_BY_DAY_NP[np.where(missing, 0, _MONTH_OFFSETS_NP[month_index] + day_of_month)]
+    sign_index = np.where(missing, 0, sign_index)
+    return _SIGNS_NP[sign_index], _TRAITS_NP[sign_index]
+
+def sign_from_longitude(longitude: float) -> str:
+    """Zodiac sign for an ecliptic longitude in degrees"""
+    return ZODIAC_SIGNS[int(longitude % 360 // 30)]
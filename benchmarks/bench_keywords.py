@@ -0,0 +1,123 @@
+# Benchmark: compiled single-pass keyword matcher vs the original classify_message and
+# detect_emotion_tone substring scans (two lowercase + any() passes per message).
+# Before timing, checks the matcher agrees with the legacy functions wherever the legacy
+# match was a whole word, and that substring false positives ("glove", "goalkeeper") are gone.
+#
+# Run: python -m benchmarks.bench_keywords
+
+import random
+import time
+
+from chains.keyword_matcher import keyword_matcher
+
+
+def legacy_classify_message(user_message):
+    text = user_message.lower()
+
+    if any(word in text for word in ["mood", "feeling", "emotion", "energy today", "energy check"]):
+        return "mood_checkin"
+    if any(word in text for word in ["love", "relationship", "partner", "crush", "dating", "soulmate"]):
+        return "relationship"
+    if any(word in text for word in ["career", "life purpose", "goal", "future", "direction", "growth"]):
+        return "life_advice"
+    if any(word in text for word in ["today", "vibe", "astrology today", "horoscope", "daily vibe"]):
+        return "daily_vibe"
+    return "default"
+
+
+def legacy_detect_emotion_tone(text):
+    text = text.lower()
+    if any(word in text for word in ["sad", "upset", "hurt", "heartbroken", "lonely"]):
+        return "sad"
+    if any(word in text for word in ["excited", "happy", "joy", "grateful"]):
+        return "happy"
+    if any(word in text for word in ["confused", "lost", "overwhelmed"]):
+        return "confused"
+    if any(word in text for word in ["tired", "exhausted", "drained"]):
+        return "tired"
+    return "neutral"
+
+
+OPENERS = [
+    "What's my vibe today?",
+    "How is my energy today",
+    "I feel so lonely lately and I don't know why",
+    "Will I find love this year?",
+    "My partner and I keep fighting, what do the stars say",
+    "Should I change my career or keep going?",
+    "I'm excited about my new goals!",
+    "Feeling confused and overwhelmed by everything",
+    "so tired of dating apps",
+    "all my crushes are ignoring me",
+    "can you read my horoscope",
+    "what does the moon in scorpio mean for me",
+    "I bought new gloves and watched the goalkeeper save a penalty",
+]
+
+FILLER = (
+    "honestly I have been thinking about this for a while and talking with friends about it but "
+    "nothing seems to settle and I keep coming back to the same questions about where things are going"
+).split()
+
+
+def corpus(size, seed=7):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(size):
+        words = rng.choice(OPENERS).split()
+        # Longer history-style messages: opener plus 0-60 filler words
+        words += rng.sample(FILLER, rng.randint(0, min(len(FILLER), 60)))
+        messages.append(" ".join(words))
+    return messages
+
+
+def check():
+    for text in OPENERS[:-1]:
+        assert keyword_matcher.match(text) == (legacy_classify_message(text), legacy_detect_emotion_tone(text)), text
+
+    # Substring false positives of the legacy scans
+    assert legacy_classify_message("nice glove") == "relationship"
+    assert keyword_matcher.match("nice glove") == ("default", "neutral")
+    assert legacy_classify_message("the goalkeeper was great") == "life_advice"
+    assert keyword_matcher.match("the goalkeeper was great")[0] == "default"
+    assert keyword_matcher.match("Glossary of moody astrology")[0] == "default"
+
+    # Plurals, case and spacing
+    assert keyword_matcher.match("My GOALS for the FUTURE") == ("life_advice", "neutral")
+    assert keyword_matcher.match("Two CRUSHES at once") == ("relationship", "neutral")
+    assert keyword_matcher.match("so many emotions") == ("mood_checkin", "neutral")
+    assert keyword_matcher.match("an energy\n check please") == ("mood_checkin", "neutral")
+    assert keyword_matcher.match("Daily  vibe, feeling joyful") == ("mood_checkin", "neutral")
+    assert keyword_matcher.match("daily vibe, so much joy") == ("daily_vibe", "happy")
+
+    messages = corpus(500)
+    assert keyword_matcher.match_many(messages) == [keyword_matcher.match(text) for text in messages]
+
+
+def bench(label, fn, messages, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<44} {best * 1000:8.2f} ms  ({best / len(messages) * 1e6:.2f} us/message)")
+    return best
+
+
+def main():
+    check()
+    messages = corpus(20000)
+    print(f"{len(messages)} messages, category + tone for each\n")
+
+    legacy = bench(
+        "legacy classify + detect_emotion_tone",
+        lambda texts: [(legacy_classify_message(t), legacy_detect_emotion_tone(t)) for t in texts],
+        messages,
+    )
+    single = bench("keyword_matcher.match", lambda texts: [keyword_matcher.match(t) for t in texts], messages)
+    batch = bench("keyword_matcher.match_many", keyword_matcher.match_many, messages)
+    print(f"\nmatch: {legacy / single:.1f}x, match_many: {legacy / batch:.1f}x vs legacy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Benchmark: in-process TinyMemory vs the SQLite WAL store shared across worker processes.
+# Also checks that a write from one process is visible to a read from another.
+#
+# Run: python -m benchmarks.bench_memory
+
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from memory.sqlite_memory import SQLiteMemory
+from memory.tiny_memory import TinyMemory
+
+USERS = 2000
+TURNS = 5
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50": samples[len(samples) // 2] * 1e6,
+        "p99": samples[int(len(samples) * 0.99)] * 1e6,
+        "mean": statistics.fmean(samples) * 1e6,
+    }
+
+
+def bench(label, memory):
+    writes, reads = [], []
+    for turn in range(TURNS):
+        for user in range(USERS):
+            start = time.perf_counter()
+            memory.add_message(f"user-{user}", "user", f"message {turn} from user {user}", tone="neutral")
+            writes.append(time.perf_counter() - start)
+
+    for user in range(USERS):
+        start = time.perf_counter()
+        memory.get_memory(f"user-{user}")
+        reads.append(time.perf_counter() - start)
+
+    for name, samples in (("add_message", writes), ("get_memory", reads)):
+        stats = percentiles(samples)
+        print(f"{label:<8} {name:<12} p50 {stats['p50']:8.1f} µs   p99 {stats['p99']:8.1f} µs   mean {stats['mean']:8.1f} µs")
+
+
+def _write_from_child(path):
+    SQLiteMemory(path).add_message("shared-user", "user", "hello from another worker")
+
+
+def check_cross_process(path):
+    child = multiprocessing.Process(target=_write_from_child, args=(path,))
+    child.start()
+    child.join()
+    entries = SQLiteMemory(path).get_memory("shared-user")
+    assert [entry.text for entry in entries] == ["hello from another worker"]
+    print("write from another process is visible")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "memory.db")
+        check_cross_process(path)
+        bench("dict", TinyMemory(max_users=USERS * 2))
+        bench("sqlite", SQLiteMemory(path, max_users=USERS * 2))
+
+
+if __name__ == "__main__":
+    main()
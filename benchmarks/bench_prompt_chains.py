@@ -0,0 +1,62 @@
+# Micro-benchmark: per-call overhead of building an LLMChain per message vs a composed
+# prompt | llm | parser RunnableSequence vs the prebuilt PromptChain in MultiPromptManager.
+# Uses a fake chat model so only the LangChain wrapping cost is measured.
+#
+# Run: python -m benchmarks.bench_prompt_chains
+
+import time
+import warnings
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+
+from chains.multi_prompt_chain import MultiPromptManager
+from chains.prompts import daily_vibe_prompt
+
+ITERATIONS = 2000
+INPUT = {"user_message": "Previous conversation:\n\nNew message:\nwhat's my vibe today?"}
+
+
+def bench(label, fn, iterations=ITERATIONS):
+    # Warm up
+    for _ in range(50):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - start) / iterations * 1e6
+    print(f"{label:<42} {per_call:10.1f} µs/call")
+    return per_call
+
+
+def main():
+    llm = FakeListChatModel(responses=["✨ Cozy vibes today, how are you feeling?"])
+    manager = MultiPromptManager(openai_api_key="unused", llm=llm)
+
+    results = {}
+    try:
+        from langchain.chains import LLMChain
+
+        def legacy():
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                chain = LLMChain(llm=llm, prompt=daily_vibe_prompt)
+            return chain.invoke(INPUT)["text"]
+
+        results["legacy"] = bench("LLMChain built per call", legacy)
+    except ImportError:
+        print("langchain.chains.LLMChain not available, skipping legacy baseline")
+
+    sequence = daily_vibe_prompt | llm | StrOutputParser()
+    results["sequence"] = bench("prebuilt prompt | llm | parser sequence", lambda: sequence.invoke(INPUT))
+
+    prebuilt = manager.chains["daily_vibe"]
+    results["prebuilt"] = bench("prebuilt PromptChain", lambda: prebuilt.invoke(INPUT))
+
+    if "legacy" in results:
+        saved = results["legacy"] - results["prebuilt"]
+        print(f"saved per call: {saved:.1f} µs ({saved / results['legacy']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Benchmark: per-item cost of the list endpoints' response_model pass vs TRUSTED_RESPONSES.
+# The default path mirrors what FastAPI does with a response_model: validate the Supabase rows
+# into the models, serialize them back to JSON-compatible data, then render. Trusted mode
+# renders the rows directly.
+#
+# Run: python -m benchmarks.bench_response_models
+
+import statistics
+import time
+from typing import List
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from models import (
+    ConversationResponse,
+    CosmicEnergyCardResponse,
+    MessageResponse,
+    MoodResponse,
+    SubscriptionResponse,
+    UserMoodResponse,
+)
+from responses import FastJSONResponse
+
+ITEMS = 200
+ROUNDS = 50
+TIMESTAMP = "2025-01-01T12:00:00.123456+00:00"
+
+
+def mood():
+    return {"id": str(uuid4()), "name": "Radiant", "emoji": "🌞", "description": "Full of light",
+            "color": "#FFD700", "created_at": TIMESTAMP}
+
+
+def energy_type():
+    return {"id": str(uuid4()), "name": "Love", "emoji": "💖", "background_color": "#FF69B4",
+            "created_at": TIMESTAMP}
+
+
+# Rows shaped the way Supabase returns them: strings for UUIDs, dates and numerics.
+# cosmic-energy-cards is already served pre-serialized from CosmicCardCache; it's here for the
+# nested-model comparison.
+ROWS = {
+    "moods": (MoodResponse, lambda: mood()),
+    "user-moods": (UserMoodResponse, lambda: {
+        "id": str(uuid4()), "user_id": str(uuid4()), "mood_id": str(uuid4()),
+        "date": TIMESTAMP, "created_at": TIMESTAMP, "mood": mood()}),
+    "conversations": (ConversationResponse, lambda: {
+        "id": str(uuid4()), "user_id": str(uuid4()), "title": "Welcome",
+        "created_at": TIMESTAMP, "updated_at": TIMESTAMP}),
+    "messages": (MessageResponse, lambda: {
+        "id": str(uuid4()), "conversation_id": str(uuid4()), "role": "assistant",
+        "content": "The Moon in Scorpio asks you to slow down and listen to what you feel.",
+        "timestamp": TIMESTAMP, "created_at": TIMESTAMP}),
+    "subscriptions": (SubscriptionResponse, lambda: {
+        "id": str(uuid4()), "user_id": str(uuid4()), "plan_name": "Premium", "price": "9.99",
+        "billing_period": "monthly", "start_date": TIMESTAMP, "end_date": None, "is_active": True,
+        "created_at": TIMESTAMP}),
+    "cosmic-energy-cards": (CosmicEnergyCardResponse, lambda: {
+        "id": str(uuid4()), "type_id": str(uuid4()), "zodiac_sign": "Scorpio", "date": "2025-01-01",
+        "insight": "Trust the quiet pull toward what matters.", "extended_insight": None,
+        "created_at": TIMESTAMP, "energy_type": energy_type()}),
+}
+
+
+def timed(fn):
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    print(f"per-item cost over {ITEMS}-row lists")
+    for name, (model, make_row) in ROWS.items():
+        adapter = TypeAdapter(List[model])
+        rows = [make_row() for _ in range(ITEMS)]
+
+        def validated():
+            return FastJSONResponse.render(None, adapter.dump_python(adapter.validate_python(rows), mode="json"))
+
+        def trusted():
+            return FastJSONResponse.render(None, rows)
+
+        full = timed(validated) / ITEMS * 1e6
+        fast = timed(trusted) / ITEMS * 1e6
+        print(f"{name:<20} response_model {full:7.2f} µs   trusted {fast:6.2f} µs   {full / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: rendering MessageResponse lists with the old json.dumps + encoder class vs orjson.
+# Also times the process-wide json.dumps patch that used to sit under every JSON call
+# (Supabase/httpx, OpenAI), and checks both renderers produce the same JSON.
+#
+# Run: python -m benchmarks.bench_serialization
+
+import datetime
+import json
+import statistics
+import time
+from uuid import UUID, uuid4
+
+from fastapi.encoders import jsonable_encoder
+
+from models import MessageResponse
+from responses import FastJSONResponse
+
+PAGE_SIZES = (1, 50, 200)
+ROUNDS = 200
+
+
+class CustomJSONEncoder(json.JSONEncoder):
+    # The encoder astro_api used before FastJSONResponse
+    def default(self, obj):
+        if isinstance(obj, (datetime.date, datetime.datetime)):
+            return obj.isoformat()
+        if isinstance(obj, UUID):
+            return str(obj)
+        return super().default(obj)
+
+
+def render_json(content):
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        cls=CustomJSONEncoder,
+    ).encode("utf-8")
+
+
+def render_orjson(content):
+    return FastJSONResponse.render(None, content)
+
+
+def patched_dumps(*args, **kwargs):
+    kwargs.setdefault("cls", CustomJSONEncoder)
+    return json.dumps(*args, **kwargs)
+
+
+def messages(count):
+    conversation_id = uuid4()
+    start = datetime.datetime(2025, 1, 1, 12, 0)
+    rows = []
+    for i in range(count):
+        timestamp = start + datetime.timedelta(minutes=i)
+        rows.append(MessageResponse(
+            id=uuid4(),
+            conversation_id=conversation_id,
+            content=f"Message {i}: the Moon in Scorpio asks you to slow down and listen to what you feel. ✨",
+            role="user" if i % 2 == 0 else "assistant",
+            timestamp=timestamp,
+            created_at=timestamp,
+        ))
+    return rows
+
+
+def timed(fn, arg):
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    for size in PAGE_SIZES:
+        models = messages(size)
+        # What the response class sees: model_dump() keeps UUID/datetime objects
+        content = [model.model_dump() for model in models]
+        assert json.loads(render_json(content)) == json.loads(render_orjson(content))
+
+        old = timed(render_json, content)
+        new = timed(render_orjson, content)
+        print(f"{size:>4} messages   json+encoder {old:9.1f} µs   orjson {new:9.1f} µs   {old / new:5.1f}x")
+
+        # FastAPI's own jsonable_encoder pass happens before either renderer when a response_model is set
+        encoded = timed(jsonable_encoder, models)
+        print(f"{'':>4}            jsonable_encoder {encoded:9.1f} µs")
+
+    # Cost of the old global patch on a plain payload like the ones httpx/OpenAI serialize
+    payload = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hello " * 50}] * 5}
+    plain = timed(json.dumps, payload)
+    patched = timed(patched_dumps, payload)
+    print(f"plain json.dumps {plain:.1f} µs   patched {patched:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Benchmark: table-driven zodiac lookup vs the original if/elif chain with strptime.
+# tests/test_zodiac.py checks the new lookups against legacy_get_zodiac_sign below.
+#
+# Run: python -m benchmarks.bench_zodiac
+
+import datetime
+import time
+
+import numpy as np
+
+from astrology.zodiac import get_zodiac_sign, zodiac_signs
+
+
+def legacy_get_zodiac_sign(birth_date):
+    if isinstance(birth_date, str):
+        try:
+            birth_date = datetime.datetime.strptime(birth_date, "%Y-%m-%d").date()
+        except Exception:
+            return "Aries"
+
+    month = birth_date.month
+    day = birth_date.day
+
+    if (month == 3 and day >= 21) or (month == 4 and day <= 19):
+        return "Aries"
+    elif (month == 4 and day >= 20) or (month == 5 and day <= 20):
+        return "Taurus"
+    elif (month == 5 and day >= 21) or (month == 6 and day <= 20):
+        return "Gemini"
+    elif (month == 6 and day >= 21) or (month == 7 and day <= 22):
+        return "Cancer"
+    elif (month == 7 and day >= 23) or (month == 8 and day <= 22):
+        return "Leo"
+    elif (month == 8 and day >= 23) or (month == 9 and day <= 22):
+        return "Virgo"
+    elif (month == 9 and day >= 23) or (month == 10 and day <= 22):
+        return "Libra"
+    elif (month == 10 and day >= 23) or (month == 11 and day <= 21):
+        return "Scorpio"
+    elif (month == 11 and day >= 22) or (month == 12 and day <= 21):
+        return "Sagittarius"
+    elif (month == 12 and day >= 22) or (month == 1 and day <= 19):
+        return "Capricorn"
+    elif (month == 1 and day >= 20) or (month == 2 and day <= 18):
+        return "Aquarius"
+    else:
+        return "Pisces"
+
+
+def bench(label, fn, count, repeat=5):
+    best = min(_timed(fn) for _ in range(repeat))
+    print(f"{label:<36} {best / count * 1e9:10.1f} ns/date")
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(0)
+    dates = np.datetime64("1950-01-01") + rng.integers(0, 365 * 60, size=100_000).astype("timedelta64[D]")
+    as_dates = dates.astype(object)
+    as_strings = [d.isoformat() for d in as_dates]
+
+    bench("legacy, date objects", lambda: [legacy_get_zodiac_sign(d) for d in as_dates], len(dates))
+    bench("table, date objects", lambda: [get_zodiac_sign(d) for d in as_dates], len(dates))
+    bench("legacy, ISO strings", lambda: [legacy_get_zodiac_sign(s) for s in as_strings], len(dates))
+    bench("table, ISO strings", lambda: [get_zodiac_sign(s) for s in as_strings], len(dates))
+    bench("vectorized, datetime64 array", lambda: zodiac_signs(dates), len(dates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Stand-in for ChatOpenAI with OpenAI-like timing: a delay before the first token, then a
+# fixed delay per token. Reports usage_metadata like ChatOpenAI(stream_usage=True), so the
+# /metrics LLM timers and token counters see realistic numbers.
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+REPLY = (
+    "The Moon is moving through your chart in a way that favours rest and honest conversations, "
+    "so give yourself room to slow down today and trust what you already feel."
+)
+
+class FakeChatModel(BaseChatModel):
+    reply: str = REPLY
+    tokens: int = 40
+    first_token_latency: float = 0.3
+    token_latency: float = 0.02
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self) -> List[str]:
+        words = self.reply.split()
+        return [f"{words[i % len(words)]} " for i in range(self.tokens)]
+
+    def _usage(self, messages: List[BaseMessage]):
+        prompt_tokens = sum(len(str(message.content).split()) for message in messages)
+        return {"input_tokens": prompt_tokens, "output_tokens": self.tokens, "total_tokens": prompt_tokens + self.tokens}
+
+    def _total_latency(self) -> float:
+        return self.first_token_latency + self.token_latency * self.tokens
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        message = AIMessage(content="".join(self._tokens()).strip(), usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._total_latency())
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._total_latency())
+        return self._result(messages)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency)
+        for token in self._tokens():
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._tokens():
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
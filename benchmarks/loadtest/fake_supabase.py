@@ -0,0 +1,414 @@
+# In-memory stand-in for the supabase Client/AsyncClient used by the load test.
+# Implements the subset of the PostgREST query builder astro_api uses (filters, ordering,
+# limits, many-to-one embeds like "*, moods(*)", insert/upsert/update/delete), the RPC
+# functions from sql/chat_persistence.sql and sql/user_settings.sql, and foreign key checks
+# on user_id. Every
+# execute() waits `latency` (+ up to `jitter`) seconds to stand in for the network round trip.
+
+import asyncio
+import copy
+import datetime
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from postgrest.exceptions import APIError
+
+# embed name -> (column on the queried table, referenced column)
+EMBEDS = {
+    "moods": ("mood_id", "id"),
+    "companion_energies": ("companion_energy_id", "id"),
+    "cosmic_energy_types": ("type_id", "id"),
+    "users": ("user_id", "id"),
+}
+
+# Tables whose user_id must reference an existing user
+USER_FOREIGN_KEYS = {
+    "user_moods", "user_companion_energies", "user_cosmic_energy_cards", "subscriptions",
+    "conversations", "astro_profiles", "daily_context",
+}
+
+_EMBED_PATTERN = re.compile(r"(\w+)\(\*\)")
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+def _check_user(db: "FakeDatabase", table: str, user_id: Any):
+    if not db.lookup("users", "id", user_id):
+        raise APIError({
+            "code": "23503",
+            "message": f'insert or update on table "{table}" violates foreign key constraint "{table}_user_id_fkey"',
+            "details": f'Key (user_id)=({user_id}) is not present in table "users".',
+        })
+
+# Columns with a hash index, so eq() lookups stay O(1) as tables grow during a run
+INDEXED_COLUMNS = ("id", "user_id", "conversation_id", "date")
+
+class FakeDatabase:
+    """Tables as lists of row dicts, shared by the sync and async clients"""
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.indexes: Dict[tuple, Dict[str, List[Dict[str, Any]]]] = {}
+        self.lock = threading.Lock()
+        self.queries = 0
+        for table, rows in (tables or {}).items():
+            for row in rows:
+                self.add(table, row)
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def add(self, table: str, row: Dict[str, Any]):
+        self.rows(table).append(row)
+        for column in INDEXED_COLUMNS:
+            if column in row:
+                self.indexes.setdefault((table, column), {}).setdefault(str(row[column]), []).append(row)
+
+    def lookup(self, table: str, column: str, value: Any) -> Optional[List[Dict[str, Any]]]:
+        """Rows where column == value via the index, or None if the column isn't indexed"""
+        if column not in INDEXED_COLUMNS:
+            return None
+        return self.indexes.get((table, column), {}).get(str(value), [])
+
+    def remove(self, table: str, removed: List[Dict[str, Any]]):
+        ids = {id(row) for row in removed}
+        rows = [row for row in self.rows(table) if id(row) not in ids]
+        self.tables[table] = []
+        for column in INDEXED_COLUMNS:
+            self.indexes.pop((table, column), None)
+        for row in rows:
+            self.add(table, row)
+
+class APIResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+def _compare(op: str, value: Any, operand: Any) -> bool:
+    if value is None:
+        return op == "is" and operand in (None, "null")
+    if op == "in":
+        return str(value) in {str(item) for item in operand}
+    if op == "is":
+        return str(value).lower() == str(operand).lower()
+    left, right = str(value), str(operand)
+    # Postgres reads booleans case-insensitively; the client sends filter values as str(True)
+    if isinstance(value, bool):
+        left = left.lower()
+    if isinstance(operand, bool):
+        right = right.lower()
+    return {
+        "eq": left == right,
+        "neq": left != right,
+        "gt": left > right,
+        "gte": left >= right,
+        "lt": left < right,
+        "lte": left <= right,
+    }[op]
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current, quoted = [], 0, "", False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def _parse_logic(expression: str, combine: Callable = any) -> Callable[[Dict[str, Any]], bool]:
+    """PostgREST or=(...) / and(...) filter syntax, e.g. 'a.gt."x",and(a.eq."x",id.gt.y)'"""
+    conditions = []
+    for part in _split_top_level(expression):
+        part = part.strip()
+        if part.startswith("and(") or part.startswith("or("):
+            name, _, inner = part.partition("(")
+            conditions.append(_parse_logic(inner[:-1], all if name == "and" else any))
+            continue
+        column, op, operand = part.split(".", 2)
+        operand = operand.strip('"')
+        conditions.append(lambda row, c=column, o=op, v=operand: _compare(o, row.get(c), v))
+    return lambda row: combine(condition(row) for condition in conditions)
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = "id"
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.equals: List[tuple] = []
+        self.orders: List[tuple] = []
+        self.limit_count: Optional[int] = None
+        self.offset = 0
+        self.single_row = False
+        self.maybe_single_row = False
+
+    # Query shape
+    def select(self, columns: str = "*", count=None):
+        self.columns = columns
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "id", **kwargs):
+        self.operation, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.operation, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    # Filters
+    def _filter(self, op: str, column: str, value: Any):
+        self.filters.append(lambda row: _compare(op, row.get(column), value))
+        return self
+
+    def eq(self, column, value):
+        self.equals.append((column, value))
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, list(values))
+
+    def is_(self, column, value):
+        return self._filter("is", column, value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        self.filters.append(_parse_logic(filters))
+        return self
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.limit_count = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self.offset, self.limit_count = start, end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def maybe_single(self):
+        self.maybe_single_row = True
+        return self
+
+    def execute(self):
+        return self.client.run(self._run)
+
+    def _run(self) -> Optional[APIResponse]:
+        db = self.client.db
+        with db.lock:
+            db.queries += 1
+            rows = db.rows(self.table)
+            if self.operation in ("insert", "upsert"):
+                return APIResponse(self._write(rows))
+
+            candidates = rows
+            for column, value in self.equals:
+                indexed = db.lookup(self.table, column, value)
+                if indexed is not None:
+                    candidates = indexed
+                    break
+            matched = [row for row in candidates if all(f(row) for f in self.filters)]
+            if self.operation == "update":
+                for row in matched:
+                    row.update(copy.deepcopy(self.payload))
+                return APIResponse(copy.deepcopy(matched))
+            if self.operation == "delete":
+                db.remove(self.table, matched)
+                return APIResponse(copy.deepcopy(matched))
+
+            for column, desc in reversed(self.orders):
+                matched.sort(key=lambda row: (row.get(column) is None, str(row.get(column))), reverse=desc)
+            end = None if self.limit_count is None else self.offset + self.limit_count
+            result = [self._project(row) for row in matched[self.offset:end]]
+
+        if self.single_row or self.maybe_single_row:
+            if len(result) != 1:
+                if self.maybe_single_row and not result:
+                    return None
+                raise APIError({
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(result)} rows",
+                })
+            return APIResponse(result[0])
+        return APIResponse(result)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        db = self.client.db
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        written = []
+        for item in payload:
+            row = {"id": str(uuid.uuid4()), "created_at": _now(), **copy.deepcopy(item)}
+            if self.table in USER_FOREIGN_KEYS and row.get("user_id") is not None:
+                _check_user(db, self.table, row["user_id"])
+            keys = self.on_conflict.split(",")
+            existing = None
+            if self.operation == "upsert":
+                candidates = db.lookup(self.table, keys[0], row.get(keys[0]))
+                existing = next(
+                    (r for r in (rows if candidates is None else candidates)
+                     if all(str(r.get(k)) == str(row.get(k)) for k in keys)),
+                    None
+                )
+            if existing is not None:
+                existing.update(row)
+            else:
+                db.add(self.table, row)
+            written.append(copy.deepcopy(row))
+        return written
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = [c.strip() for c in _split_top_level(self.columns)]
+        projected = {}
+        for column in columns:
+            embed = _EMBED_PATTERN.fullmatch(column)
+            if embed:
+                local, remote = EMBEDS[embed.group(1)]
+                targets = self.client.db.lookup(embed.group(1), remote, row.get(local))
+                target = targets[0] if targets else None
+                projected[embed.group(1)] = copy.deepcopy(target)
+            elif column == "*":
+                projected.update(copy.deepcopy(row))
+            else:
+                projected[column] = copy.deepcopy(row.get(column))
+        return projected
+
+class FakeRPC:
+    def __init__(self, client: "FakeSupabase", function: Callable, params: Dict[str, Any]):
+        self.client = client
+        self.function = function
+        self.params = params
+
+    def execute(self):
+        return self.client.run(self._run)
+
+    def _run(self) -> APIResponse:
+        with self.client.db.lock:
+            self.client.db.queries += 1
+            return APIResponse(self.function(self.client.db, self.params))
+
+def record_chat_turn(db: FakeDatabase, params: Dict[str, Any]):
+    rows = [
+        {**message, "conversation_id": params["p_conversation_id"], "created_at": _now()}
+        for message in params["p_messages"]
+    ]
+    for row in rows:
+        db.add("messages", row)
+    return copy.deepcopy(rows)
+
+def create_user_with_welcome(db: FakeDatabase, params: Dict[str, Any]):
+    now = _now()
+    user = {"id": str(uuid.uuid4()), "is_premium": False, "created_at": now, "updated_at": now, **params["p_user"]}
+    conversation_id = str(uuid.uuid4())
+    db.add("users", user)
+    db.add("conversations", {
+        "id": conversation_id, "user_id": user["id"], "title": "Welcome", "created_at": now, "updated_at": now
+    })
+    db.add("messages", {
+        "id": str(uuid.uuid4()), "conversation_id": conversation_id, "content": params["p_welcome_message"],
+        "role": "assistant", "timestamp": now, "created_at": now
+    })
+    return [copy.deepcopy(user)]
+
+def set_user_companion_energy(db: FakeDatabase, params: Dict[str, Any]):
+    energy = {"id": str(uuid.uuid4()), "is_active": True, "created_at": _now(), **params["p_energy"]}
+    _check_user(db, "user_companion_energies", energy["user_id"])
+    if energy["is_active"]:
+        for row in db.lookup("user_companion_energies", "user_id", energy["user_id"]):
+            row["is_active"] = False
+    db.add("user_companion_energies", energy)
+    return [copy.deepcopy(energy)]
+
+def create_subscription(db: FakeDatabase, params: Dict[str, Any]):
+    now = _now()
+    subscription = {"id": str(uuid.uuid4()), "is_active": True, "created_at": now, "updated_at": now, **params["p_subscription"]}
+    _check_user(db, "subscriptions", subscription["user_id"])
+    db.add("subscriptions", subscription)
+    for user in db.lookup("users", "id", subscription["user_id"]):
+        user["is_premium"] = True
+    return [copy.deepcopy(subscription)]
+
+RPC_FUNCTIONS = {
+    "record_chat_turn": record_chat_turn,
+    "create_user_with_welcome": create_user_with_welcome,
+    "set_user_companion_energy": set_user_companion_energy,
+    "create_subscription": create_subscription,
+}
+
+class FakeSupabase:
+    """Synchronous client; execute() blocks for the simulated latency"""
+
+    def __init__(self, db: FakeDatabase, latency: float = 0.0, jitter: float = 0.0):
+        self.db = db
+        self.latency = latency
+        self.jitter = jitter
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRPC:
+        return FakeRPC(self, RPC_FUNCTIONS[name], params or {})
+
+    def delay(self) -> float:
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def run(self, query: Callable):
+        delay = self.delay()
+        if delay:
+            time.sleep(delay)
+        return query()
+
+class FakeAsyncSupabase(FakeSupabase):
+    """Async client; execute() returns a coroutine that sleeps on the event loop"""
+
+    async def run(self, query: Callable):
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return query()
@@ -0,0 +1,264 @@
+# Offline load test: drives astro_api at a target request rate against the in-memory Supabase
+# and LLM stand-ins, and reports latency percentiles and throughput per endpoint.
+#
+# Requests are sent open-loop (on schedule, whether or not earlier ones have finished) and
+# latency is measured from each request's scheduled time, so queueing inside the app shows up
+# in the percentiles instead of silently lowering the request rate.
+#
+# Run: python -m benchmarks.loadtest.run --rps 50 --duration 30
+#      python -m benchmarks.loadtest.run --db-latency 0.03 --first-token-latency 0.5 --json
+#      python -m benchmarks.loadtest.run --max-p95-ms 1500   # non-zero exit on regression
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import sys
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.loadtest.fake_llm import FakeChatModel
+from benchmarks.loadtest.fake_supabase import FakeAsyncSupabase, FakeDatabase, FakeSupabase
+
+ZODIAC_SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces",
+]
+
+MESSAGES = [
+    "how is my energy looking today",
+    "I feel a bit lost about my career lately",
+    "what should I focus on in my relationship this week",
+    "I'm so tired and drained after work",
+    "any advice for staying calm before my exam",
+    "what does the moon mean for my mood today",
+]
+
+def seed(users: int, history: int = 4) -> Tuple[FakeDatabase, Dict[str, List[str]]]:
+    """Reference tables, today's cards and `users` users, each with a profile, an active
+    companion energy and a conversation holding `history` messages"""
+    now = datetime.datetime.now()
+    today = datetime.date.today().isoformat()
+    new_id = lambda: str(uuid.uuid4())
+
+    moods = [
+        {"id": new_id(), "name": name, "emoji": emoji, "description": name, "color": "#888888"}
+        for name, emoji in (("Happy", "😊"), ("Calm", "😌"), ("Sad", "😢"), ("Anxious", "😰"), ("Tired", "😴"))
+    ]
+    energies = [
+        {"id": new_id(), "name": name, "emoji": "✨", "description": name}
+        for name in ("Wise & Calm", "Playful", "Bold", "Nurturing")
+    ]
+    energy_types = [
+        {"id": new_id(), "name": name, "emoji": "🌟", "background_color": "#222244"}
+        for name in ("Love", "Career", "Health", "Spirit")
+    ]
+    cards = [
+        {"id": new_id(), "type_id": energy_type["id"], "zodiac_sign": sign, "date": today,
+         "insight": f"{energy_type['name']} energy is strong for {sign} today.", "extended_insight": None}
+        for sign in ZODIAC_SIGNS for energy_type in energy_types
+    ]
+
+    tables: Dict[str, List[Dict[str, Any]]] = {
+        "moods": moods, "companion_energies": energies, "cosmic_energy_types": energy_types,
+        "cosmic_energy_cards": cards, "users": [], "astro_profiles": [], "user_companion_energies": [],
+        "conversations": [], "messages": [],
+    }
+    ids = {"users": [], "conversations": [], "moods": [mood["id"] for mood in moods]}
+    for i in range(users):
+        user_id, conversation_id = new_id(), new_id()
+        sign = ZODIAC_SIGNS[i % len(ZODIAC_SIGNS)]
+        tables["users"].append({
+            "id": user_id, "name": f"User {i}", "pronouns": "they/them", "birth_date": "1994-06-15",
+            "birth_place": "Lisbon", "is_premium": False, "created_at": now.isoformat(),
+        })
+        tables["astro_profiles"].append({
+            "user_id": user_id, "sun_sign": sign, "moon_sign": ZODIAC_SIGNS[(i + 4) % 12],
+            "rising_sign": ZODIAC_SIGNS[(i + 8) % 12],
+        })
+        tables["user_companion_energies"].append({
+            "id": new_id(), "user_id": user_id, "companion_energy_id": energies[i % len(energies)]["id"], "is_active": True,
+        })
+        tables["conversations"].append({
+            "id": conversation_id, "user_id": user_id, "title": "Welcome",
+            "created_at": now.isoformat(), "updated_at": now.isoformat(),
+        })
+        for turn in range(history):
+            timestamp = (now - datetime.timedelta(minutes=history - turn)).isoformat()
+            tables["messages"].append({
+                "id": new_id(), "conversation_id": conversation_id, "role": "user" if turn % 2 == 0 else "assistant",
+                "content": MESSAGES[turn % len(MESSAGES)], "timestamp": timestamp, "created_at": timestamp,
+            })
+        ids["users"].append(user_id)
+        ids["conversations"].append(conversation_id)
+    return FakeDatabase(tables), ids
+
+def load_app(db: FakeDatabase, db_latency: float, db_jitter: float, llm):
+    """Import astro_api with supabase.create_client/acreate_client returning the fakes"""
+    os.environ.setdefault("SUPABASE_URL", "http://supabase.loadtest")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "loadtest")
+    os.environ.setdefault("SUPABASE_API_KEY", "loadtest")
+    os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import supabase
+
+    def create_client(url, key, options=None):
+        return FakeSupabase(db, db_latency, db_jitter)
+
+    async def acreate_client(url, key, options=None):
+        return FakeAsyncSupabase(db, db_latency, db_jitter)
+
+    supabase.create_client = create_client
+    supabase.acreate_client = acreate_client
+
+    import astro_api
+    from chains.multi_prompt_chain import MultiPromptManager
+    from metrics import LLMMetricsCallback
+
+    astro_api.multi_prompt_manager = MultiPromptManager(openai_api_key="loadtest", llm=llm.model_copy(
+        update={"callbacks": [LLMMetricsCallback()]}
+    ), response_cache=astro_api.response_cache)
+    return astro_api
+
+def scenarios(ids: Dict[str, List[str]], rng: random.Random) -> Dict[str, Callable[[], Tuple[str, str, Optional[dict]]]]:
+    """endpoint name -> function returning (method, url, json body)"""
+    def message():
+        return "POST", "/messages", {"conversation_id": rng.choice(ids["conversations"]), "content": rng.choice(MESSAGES)}
+
+    def cards():
+        return "GET", f"/cosmic-energy-cards?zodiac_sign={rng.choice(ZODIAC_SIGNS)}", None
+
+    def user_mood():
+        return "POST", "/user-moods", {"user_id": rng.choice(ids["users"]), "mood_id": rng.choice(ids["moods"])}
+
+    def user():
+        return "POST", "/users", {
+            "name": "Load Test", "pronouns": "they/them", "birth_date": "1990-01-01", "birth_place": "Lisbon",
+        }
+
+    return {"messages": message, "cosmic-energy-cards": cards, "user-moods": user_mood, "users": user}
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"messages=1,cosmic-energy-cards=4" -> {"messages": 1.0, "cosmic-energy-cards": 4.0}"""
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name:
+            mix[name] = float(weight or 1)
+    return mix
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+async def drive(app, requests: Dict[str, Callable], mix: Dict[str, float], rps: float, duration: float,
+                timeout: float, rng: random.Random) -> Tuple[Dict[str, List[Tuple[float, int]]], float]:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results: Dict[str, List[Tuple[float, int]]] = {name: [] for name in names}
+    loop = asyncio.get_running_loop()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://astro.loadtest", timeout=timeout) as client:
+        async def send(name: str, scheduled: float):
+            method, url, body = requests[name]()
+            try:
+                response = await client.request(method, url, json=body)
+                status = response.status_code
+            except Exception:
+                status = 0
+            results[name].append((loop.time() - scheduled, status))
+
+        tasks = []
+        start = loop.time()
+        for i in range(int(rps * duration)):
+            scheduled = start + i / rps
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(send(name, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+    return results, elapsed
+
+def summarize(results: Dict[str, List[Tuple[float, int]]], elapsed: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    everything = [sample for samples in results.values() for sample in samples]
+    for name, samples in list(results.items()) + [("all", everything)]:
+        latencies = [latency * 1000 for latency, _ in samples]
+        errors = sum(1 for _, status in samples if not 200 <= status < 400)
+        summary[name] = {
+            "requests": len(samples),
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "throughput_rps": round((len(samples) - errors) / elapsed, 1) if elapsed else 0.0,
+        }
+    return summary
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(args.seed)
+    db, ids = seed(args.users)
+    llm = FakeChatModel(tokens=args.tokens, first_token_latency=args.first_token_latency, token_latency=args.token_latency)
+    astro_api = load_app(db, args.db_latency, args.db_jitter, llm)
+
+    mix = parse_mix(args.mix)
+    requests = scenarios(ids, rng)
+    unknown = set(mix) - set(requests)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))} (choose from {', '.join(requests)})")
+
+    # Runs the app's startup/shutdown hooks (async client, card cache, write-behind queue)
+    async with astro_api.app.router.lifespan_context(astro_api.app):
+        results, elapsed = await drive(astro_api.app, requests, mix, args.rps, args.duration, args.timeout, rng)
+
+    summary = summarize(results, elapsed)
+    summary["all"]["db_queries"] = db.queries
+    return summary
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline load test for astro_api with fake Supabase and LLM")
+    parser.add_argument("--rps", type=float, default=20, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to send requests for")
+    parser.add_argument("--mix", default="messages=1,cosmic-energy-cards=4,user-moods=2,users=1",
+                        help="Endpoint weights, name=weight comma separated")
+    parser.add_argument("--users", type=int, default=500, help="Seeded users (each with one conversation)")
+    parser.add_argument("--db-latency", type=float, default=0.015, help="Seconds per Supabase round trip")
+    parser.add_argument("--db-jitter", type=float, default=0.005, help="Extra random seconds per round trip, up to")
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="Seconds before the LLM's first token")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Seconds per generated token")
+    parser.add_argument("--tokens", type=int, default=40, help="Tokens per LLM reply")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit non-zero if any endpoint's p95 exceeds this")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ok req/s':>10}")
+        for name, row in summary.items():
+            print(f"{name:<22}{row['requests']:>9}{row['errors']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+                  f"{row['p99_ms']:>10}{row['throughput_rps']:>10}")
+        print(f"target {args.rps} req/s for {args.duration}s, {summary['all']['db_queries']} Supabase round trips")
+
+    if args.max_p95_ms is not None:
+        slow = [name for name, row in summary.items() if row["p95_ms"] > args.max_p95_ms]
+        if slow:
+            print(f"p95 above {args.max_p95_ms} ms: {', '.join(slow)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import threading
+import time
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cache.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Key used for the unfiltered (all signs) response of a date
+ALL_SIGNS = "*"
+
+class CosmicCardCache:
+    """Already-serialized GET /cosmic-energy-cards responses keyed by (zodiac_sign, date).
+
+    One query per date loads every card for that day; the rows are grouped by sign and each
+    group is serialized once, so a day is 13 byte strings (12 signs plus the unfiltered list).
+    Only dates in the [yesterday, today + keep_days_ahead] window are kept in memory; other
+    dates are fetched for the requested sign alone on every call. Concurrent loads of the
+    same date share one query.
+
+    The scheduler reloads the window every `refresh_seconds`, replacing the cached days in
+    place. Entries expire after `ttl_seconds` (three refreshes by default), so requests only
+    load a day themselves when refreshes have been failing.
+    """
+
+    def __init__(self, supabase, serialize: Callable[[List[dict]], bytes],
+                 refresh_seconds: float = 900, keep_days_ahead: int = 1, ttl_seconds: Optional[float] = None):
+        self.supabase = supabase
+        self.serialize = serialize
+        self.refresh_seconds = refresh_seconds
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else 3 * refresh_seconds
+        self.keep_days_ahead = keep_days_ahead
+        self._lock = threading.Lock()
+        # date -> (loaded_at, {sign: bytes})
+        self._days: Dict[str, Tuple[float, Dict[str, bytes]]] = {}
+        self._empty = serialize([])
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, zodiac_sign: str, date: datetime.date) -> bytes:
+        if not self._in_window(date):
+            with self._lock:
+                self.misses += 1
+            sign = zodiac_sign or ALL_SIGNS
+            return self._flight.do((date.isoformat(), sign), lambda: self._fetch_sign(date, zodiac_sign))
+
+        key = date.isoformat()
+        with self._lock:
+            day = self._days.get(key)
+            if day is not None and time.monotonic() - day[0] < self.ttl_seconds:
+                self.hits += 1
+                return day[1].get(zodiac_sign or ALL_SIGNS, self._empty)
+            self.misses += 1
+
+        responses = self._load(date)
+        with self._lock:
+            self._days[key] = (time.monotonic(), responses)
+        return responses.get(zodiac_sign or ALL_SIGNS, self._empty)
+
+    def warm(self, dates: List[datetime.date]):
+        for date in dates:
+            responses = self._load(date)
+            with self._lock:
+                self._days[date.isoformat()] = (time.monotonic(), responses)
+
+    def roll_over(self):
+        """Drop days that have fallen out of the window"""
+        with self._lock:
+            for key in list(self._days):
+                if not self._in_window(datetime.date.fromisoformat(key)):
+                    del self._days[key]
+
+    def invalidate(self):
+        with self._lock:
+            self._days.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self._flight.shared, "dates": sorted(self._days)}
+
+    def _in_window(self, date: datetime.date) -> bool:
+        today = datetime.date.today()
+        return today - datetime.timedelta(days=1) <= date <= today + datetime.timedelta(days=self.keep_days_ahead)
+
+    def _load(self, date: datetime.date) -> Dict[str, bytes]:
+        return self._flight.do(date.isoformat(), lambda: self._fetch(date))
+
+    def _query(self, date: datetime.date, zodiac_sign: Optional[str] = None) -> List[dict]:
+        query = self.supabase.table('cosmic_energy_cards').select(
+            "*, cosmic_energy_types(*)"
+        ).eq("date", date.isoformat())
+        if zodiac_sign:
+            query = query.eq("zodiac_sign", zodiac_sign)
+
+        # Format rows to match our model
+        cards = []
+        for item in query.execute().data or []:
+            item["energy_type"] = item.pop("cosmic_energy_types", {})
+            cards.append(item)
+        return cards
+
+    def _fetch_sign(self, date: datetime.date, zodiac_sign: Optional[str]) -> bytes:
+        return self.serialize(self._query(date, zodiac_sign))
+
+    def _fetch(self, date: datetime.date) -> Dict[str, bytes]:
+        by_sign = defaultdict(list)
+        cards = self._query(date)
+        for item in cards:
+            by_sign[item.get("zodiac_sign")].append(item)
+
+        responses = {sign: self.serialize(items) for sign, items in by_sign.items()}
+        responses[ALL_SIGNS] = self.serialize(cards)
+        return responses
+
+async def run_card_cache_scheduler(card_cache: CosmicCardCache, refresh_seconds: Optional[float] = None):
+    """Keep today and tomorrow warm, refreshing periodically and rolling over at midnight"""
+    refresh_seconds = refresh_seconds or card_cache.refresh_seconds
+    while True:
+        today = datetime.date.today()
+        try:
+            await asyncio.to_thread(
+                card_cache.warm,
+                [today + datetime.timedelta(days=offset) for offset in range(card_cache.keep_days_ahead + 1)]
+            )
+            card_cache.roll_over()
+        except Exception as e:
+            logger.warning(f"Error warming cosmic energy card cache: {str(e)}")
+
+        # Wake up for the next refresh, or just after midnight if that comes first
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+        await asyncio.sleep(max(1.0, min(refresh_seconds, (midnight - now).total_seconds() + 1)))
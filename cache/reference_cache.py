@@ -0,0 +1,81 @@
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from cache.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Tables that change a few times a year and are safe to serve from process memory
+REFERENCE_TABLES = ("moods", "companion_energies", "cosmic_energy_types")
+
+class ReferenceCache:
+    """In-process TTL cache for small reference tables.
+
+    Each table is loaded whole with one query and then served from memory until it is
+    older than `ttl_seconds` or explicitly invalidated. Rows are shared between callers
+    and must be treated as read-only. Concurrent loads of the same table share one query.
+    """
+
+    def __init__(self, supabase, ttl_seconds: float = 3600, miss_refresh_seconds: float = 30):
+        self.supabase = supabase
+        self.ttl_seconds = ttl_seconds
+        # An id lookup that misses reloads the table at most this often, so rows added since
+        # the last load are picked up without letting unknown ids hammer the database
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def get_all(self, table: str) -> List[Dict[str, Any]]:
+        return self._get_entry(table)["rows"]
+
+    def get_by_id(self, table: str, row_id) -> Optional[Dict[str, Any]]:
+        entry = self._get_entry(table)
+        row = entry["by_id"].get(str(row_id))
+        if row is None and time.monotonic() - entry["loaded_at"] >= self.miss_refresh_seconds:
+            row = self._load(table)["by_id"].get(str(row_id))
+        return row
+
+    def invalidate(self, table: Optional[str] = None):
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(table, None)
+
+    def warm(self, tables=REFERENCE_TABLES):
+        for table in tables:
+            self._load(table)
+        logger.info(f"Reference cache warmed: {', '.join(tables)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self._flight.shared, "tables": list(self._entries)}
+
+    def _get_entry(self, table: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is not None and time.monotonic() - entry["loaded_at"] < self.ttl_seconds:
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return self._load(table)
+
+    def _load(self, table: str) -> Dict[str, Any]:
+        return self._flight.do(table, lambda: self._fetch(table))
+
+    def _fetch(self, table: str) -> Dict[str, Any]:
+        result = self.supabase.table(table).select("*").execute()
+        rows = result.data or []
+        entry = {
+            "rows": rows,
+            "by_id": {str(row["id"]): row for row in rows if "id" in row},
+            "loaded_at": time.monotonic(),
+        }
+        with self._lock:
+            self._entries[table] = entry
+        return entry
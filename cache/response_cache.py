@@ -0,0 +1,95 @@
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough OpenAI tokenizer ratio for English text, used to estimate tokens saved
+CHARS_PER_TOKEN = 4
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_message(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace, so "What's my vibe today?!" and
+    "what's my  vibe today" share a key"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+class ResponseCache:
+    """Reuses AI replies to repeated short messages from users in the same situation.
+
+    Keys are (message type, *scope, normalized message), where the scope must hold everything
+    else the reply was generated from (the user's placements, companion energy, earlier
+    turns), so a reply is never served to a user whose prompt would have differed. Each key
+    holds a pool of up to `variants` replies: until the pool is full every lookup misses and
+    the caller adds the reply it generates, after that a random reply from the pool is served
+    until the key is `ttl_seconds` old. Messages longer than `max_words` aren't cached, since
+    they are personal and rarely repeat. Replies are only worth sharing while they don't
+    depend on the user's own earlier turns, so callers should only look up opening messages.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, variants: int = 3, max_keys: int = 10000, max_words: int = 12):
+        self.ttl_seconds = ttl_seconds
+        self.variants = variants
+        self.max_keys = max_keys
+        self.max_words = max_words
+        self._lock = threading.Lock()
+        # key -> (created_at, [(reply, estimated tokens)])
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[float, List[Tuple[str, int]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def make_key(self, message_type: str, scope: Tuple, user_message: str) -> Optional[Tuple[str, ...]]:
+        """Cache key for the message, or None if it shouldn't be cached"""
+        text = normalize_message(user_message)
+        if not text or len(text.split()) > self.max_words:
+            return None
+        return (message_type, *(str(value) for value in scope), text)
+
+    def get(self, key: Tuple[str, ...]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None or len(entry[1]) < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            reply, tokens = random.choice(entry[1])
+            self.hits += 1
+            self.tokens_saved += tokens
+            return reply
+
+    def put(self, key: Tuple[str, ...], reply: str, prompt: str = ""):
+        """Add a freshly generated reply to the key's pool; `prompt` is the full LLM input, used
+        to estimate the tokens each later hit saves"""
+        if not reply:
+            return
+        tokens = (len(prompt) + len(reply)) // CHARS_PER_TOKEN
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+                entry = self._entries[key] = (time.monotonic(), [])
+            self._entries.move_to_end(key)
+            if len(entry[1]) < self.variants:
+                entry[1].append((reply, tokens))
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "tokens_saved": self.tokens_saved,
+                "keys": len(self._entries),
+            }
@@ -0,0 +1,95 @@
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Message type -> keywords, highest priority first (a message matching several types gets the first)
+CATEGORY_KEYWORDS: Dict[str, Sequence[str]] = {
+    "mood_checkin": ["mood", "feeling", "emotion", "energy today", "energy check"],
+    "relationship": ["love", "relationship", "partner", "crush", "dating", "soulmate"],
+    "life_advice": ["career", "life purpose", "goal", "future", "direction", "growth"],
+    "daily_vibe": ["today", "vibe", "astrology today", "horoscope", "daily vibe"],
+}
+
+# Emotional tone -> keywords, same priority rule
+TONE_KEYWORDS: Dict[str, Sequence[str]] = {
+    "sad": ["sad", "upset", "hurt", "heartbroken", "lonely"],
+    "happy": ["excited", "happy", "joy", "grateful"],
+    "confused": ["confused", "lost", "overwhelmed"],
+    "tired": ["tired", "exhausted", "drained"],
+}
+
+DEFAULT_CATEGORY = "default"
+DEFAULT_TONE = "neutral"
+
+class KeywordMatcher:
+    """Finds a message's type and emotional tone in one regex scan.
+
+    All keywords of both tables are compiled into a single alternation bounded by word
+    boundaries, so "glove" doesn't match "love" and "goalkeeper" doesn't match "goal". A
+    trailing plural "s" or "es" is allowed ("goals", "feelings", "crushes"), and the words of
+    a phrase may be separated by any whitespace. The alternation is factored into a prefix trie
+    ("c(?:areer|onfused|rush)|..."), which keeps the regex engine from retrying every
+    keyword at every position (see benchmarks/bench_keywords.py).
+    """
+
+    def __init__(self, categories: Dict[str, Sequence[str]] = CATEGORY_KEYWORDS,
+                 tones: Dict[str, Sequence[str]] = TONE_KEYWORDS):
+        # keyword -> [(0 for categories / 1 for tones, priority, label)]
+        self._keywords: Dict[str, List[Tuple[int, int, str]]] = {}
+        for kind, table in enumerate((categories, tones)):
+            for priority, (label, words) in enumerate(table.items()):
+                for word in words:
+                    self._keywords.setdefault(self._canonical(word), []).append((kind, priority, label))
+
+        # Matched against lowercased text: cheaper than re.IGNORECASE
+        self._pattern = re.compile(r"\b(" + _trie_pattern(self._keywords) + r")(?:e?s)?\b")
+
+    @staticmethod
+    def _canonical(word: str) -> str:
+        return " ".join(word.lower().split())
+
+    def match(self, text: str) -> Tuple[str, str]:
+        """(message type, tone), falling back to ("default", "neutral")"""
+        best = [None, None]
+        for found in self._pattern.findall(text.lower()):
+            labels = self._keywords.get(found) or self._keywords[self._canonical(found)]
+            for kind, priority, label in labels:
+                if best[kind] is None or priority < best[kind][0]:
+                    best[kind] = (priority, label)
+            if best[0] is not None and best[1] is not None and best[0][0] == 0 and best[1][0] == 0:
+                break
+        return (
+            best[0][1] if best[0] is not None else DEFAULT_CATEGORY,
+            best[1][1] if best[1] is not None else DEFAULT_TONE,
+        )
+
+    def match_many(self, texts: Iterable[str]) -> List[Tuple[str, str]]:
+        """match() over many messages, e.g. for tagging the historical messages table offline"""
+        match = self.match
+        return [match(text or "") for text in texts]
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation of `words` with shared prefixes factored out; spaces match any whitespace"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # A keyword ends here, and a longer one may continue: regex quantifiers are greedy
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+# Shared instance built from the tables above
+keyword_matcher = KeywordMatcher()
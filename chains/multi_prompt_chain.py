@@ -1,5 +1,7 @@
-from langchain.chains import LLMChain
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
+import asyncio
 import random
 
 from chains.prompts import (
@@ -10,14 +12,46 @@ from chains.prompts import (
     default_prompt
 )
 from chains.classifier import classify_message
+from chains.keyword_matcher import keyword_matcher
+
+class PromptChain(Runnable):
+    """prompt -> llm -> parser, built once per prompt type and reused.
+
+    Equivalent to `prompt | llm | parser`, but the prompt is formatted and the output
+    parsed as plain calls, so only the LLM call goes through LangChain's per-step
+    config/callback setup (see benchmarks/bench_prompt_chains.py).
+    """
+
+    def __init__(self, prompt, llm, parser=None):
+        self.prompt = prompt
+        self.llm = llm
+        self.parser = parser or StrOutputParser()
+
+    def invoke(self, input, config=None, **kwargs):
+        messages = self.prompt.format_messages(**input)
+        return self.parser.parse(self.llm.invoke(messages, config=config, **kwargs).content)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        messages = self.prompt.format_messages(**input)
+        response = await self.llm.ainvoke(messages, config=config, **kwargs)
+        return self.parser.parse(response.content)
+
+    async def astream(self, input, config=None, **kwargs):
+        messages = self.prompt.format_messages(**input)
+        async for chunk in self.llm.astream(messages, config=config, **kwargs):
+            if chunk.content:
+                yield chunk.content
 
 class MultiPromptManager:
-    def __init__(self, openai_api_key: str):
-        self.llm = ChatOpenAI(
+    def __init__(self, openai_api_key: str, llm=None, callbacks=None, response_cache=None):
+        self.llm = llm or ChatOpenAI(
             model="gpt-4o-mini", 
             temperature=0.7, 
             api_key=openai_api_key,
-            max_tokens=75
+            max_tokens=75,
+            callbacks=callbacks,
+            # Report token usage on streamed responses too
+            stream_usage=True
         )
 
         # Map types to prompts
@@ -29,31 +63,123 @@ class MultiPromptManager:
             "default": default_prompt,
         }
 
-    def run(self, user_id: str, user_message: str, memory_manager, force_type=None):
-        if len(user_message.split()) < 3 or user_message.lower() in ["ok", "hmm", "idk", "lol", "k", "whatever"]:
+        # Build one prompt -> llm -> parser chain per type up front and reuse it for every message
+        self.chains = {
+            message_type: PromptChain(prompt, self.llm)
+            for message_type, prompt in self.prompt_map.items()
+        }
+
+        # Optional cache.response_cache.ResponseCache for repeated opening messages
+        self.response_cache = response_cache
+
+    def run(self, memory_key: str, user_message: str, memory_manager, force_type=None, context=None, cache_scope=None):
+        """Reply to user_message. memory_key selects the chat memory (e.g. a conversation id);
+        context is extra per-turn text for the prompt that isn't stored in memory.
+        cache_scope holds every user-specific value in `context` (signs, companion energy); the
+        reply may be shared through the response cache with users that have the same values.
+        None never uses the cache."""
+        if context is None and is_tiny_message(user_message):
+            return get_tiny_reply(user_message)
+
+        chain, full_input, cache_key = self._prepare(memory_key, user_message, memory_manager, force_type, context, cache_scope)
+        response = self.response_cache.get(cache_key) if cache_key else None
+        if response is None:
+            response = chain.invoke({"user_message": full_input})
+            if cache_key:
+                self.response_cache.put(cache_key, response, full_input)
+
+        self._remember(memory_key, user_message, response, memory_manager)
+        return response
+
+    async def arun(self, memory_key: str, user_message: str, memory_manager, force_type=None, context=None, cache_scope=None):
+        """Async counterpart of run() for use from async request handlers"""
+        if context is None and is_tiny_message(user_message):
             return get_tiny_reply(user_message)
 
+        chain, full_input, cache_key = await memory_call(
+            memory_manager, self._prepare, memory_key, user_message, memory_manager, force_type, context, cache_scope
+        )
+        response = self.response_cache.get(cache_key) if cache_key else None
+        if response is None:
+            response = await chain.ainvoke({"user_message": full_input})
+            if cache_key:
+                self.response_cache.put(cache_key, response, full_input)
+
+        await memory_call(memory_manager, self._remember, memory_key, user_message, response, memory_manager)
+        return response
+
+    async def astream(self, memory_key: str, user_message: str, memory_manager, force_type=None, context=None, cache_scope=None, remember=True):
+        """Yield the reply token by token; memory is updated once the stream completes.
+        A reply served from the response cache comes as a single chunk.
+        With remember=False the caller updates memory itself through aremember(), e.g. so a
+        reply cut short by a client disconnect is remembered as far as it got."""
+        if context is None and is_tiny_message(user_message):
+            yield get_tiny_reply(user_message)
+            return
+
+        chain, full_input, cache_key = await memory_call(
+            memory_manager, self._prepare, memory_key, user_message, memory_manager, force_type, context, cache_scope
+        )
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            yield cached
+            if remember:
+                await self.aremember(memory_key, user_message, cached, memory_manager)
+            return
+
+        parts = []
+        async for chunk in chain.astream({"user_message": full_input}):
+            if chunk:
+                parts.append(chunk)
+                yield chunk
+
+        response = "".join(parts)
+        if cache_key:
+            self.response_cache.put(cache_key, response, full_input)
+        if remember:
+            await self.aremember(memory_key, user_message, response, memory_manager)
+
+    async def aremember(self, memory_key: str, user_message: str, ai_text: str, memory_manager):
+        """Add a turn to memory, off the event loop when the backend blocks"""
+        await memory_call(memory_manager, self._remember, memory_key, user_message, ai_text, memory_manager)
+
+    def _prepare(self, memory_key: str, user_message: str, memory_manager, force_type=None, context=None, cache_scope=None):
         message_type = force_type or classify_message(user_message)
 
-        # Pick prompt
-        prompt_template = self.prompt_map.get(message_type, default_prompt)
+        # Pick the prebuilt chain for this type
+        chain = self.chains.get(message_type, self.chains["default"])
 
         # Retrieve past memory (tiny convo history)
-        past_memory = memory_manager.get_memory(user_id)
-        memory_text = "\n".join([f"{m['role'].capitalize()}: {m['text']}" for m in past_memory])
+        past_memory = memory_manager.get_memory(memory_key)
+        memory_text = "\n".join([f"{m.role.capitalize()}: {m.text}" for m in past_memory])
 
         # Format prompt
         full_input = f"Previous conversation:\n{memory_text}\n\nNew message:\n{user_message}"
+        if context:
+            full_input = f"{context}\n{full_input}"
+
+        # Only openers are shared: before the user's first turn memory holds at most assistant
+        # messages like the signup welcome, which are part of the key since they're in the prompt
+        cache_key = None
+        if self.response_cache is not None and cache_scope is not None and all(m.role != "user" for m in past_memory):
+            cache_key = self.response_cache.make_key(message_type, (*cache_scope, memory_text), user_message)
 
-        chain = LLMChain(llm=self.llm, prompt=prompt_template)
-        response = chain.invoke({"user_message": full_input})
+        return chain, full_input, cache_key
 
+    def _remember(self, memory_key: str, user_message: str, ai_text: str, memory_manager):
         # Update memory
         emotion_tone = detect_emotion_tone(user_message)
-        memory_manager.add_message(user_id, "user", {"text": user_message, "tone": emotion_tone})
-        memory_manager.add_message(user_id, "ai", {"text": response['text'], "tone": "neutral"})
+        memory_manager.add_message(memory_key, "user", user_message, tone=emotion_tone)
+        memory_manager.add_message(memory_key, "ai", ai_text, tone="neutral")
+
+async def memory_call(memory_manager, fn, *args):
+    """fn(*args) from a worker thread when the memory backend blocks (SQLiteMemory)"""
+    if getattr(memory_manager, "blocking", False):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
 
-        return response['text']
+def is_tiny_message(user_message: str) -> bool:
+    return len(user_message.split()) < 3 or user_message.lower() in ["ok", "hmm", "idk", "lol", "k", "whatever"]
 
 def get_tiny_reply(user_message=None):
     tiny_replies = [
@@ -68,13 +194,4 @@ def get_tiny_reply(user_message=None):
     return random.choice(tiny_replies)
 
 def detect_emotion_tone(text):
-    text = text.lower()
-    if any(word in text for word in ["sad", "upset", "hurt", "heartbroken", "lonely"]):
-        return "sad"
-    if any(word in text for word in ["excited", "happy", "joy", "grateful"]):
-        return "happy"
-    if any(word in text for word in ["confused", "lost", "overwhelmed"]):
-        return "confused"
-    if any(word in text for word in ["tired", "exhausted", "drained"]):
-        return "tired"
-    return "neutral"
\ No newline at end of file
+    return keyword_matcher.match(text)[1]
@@ -83,4 +83,17 @@ default_prompt = ChatPromptTemplate.from_messages([
      "Today's focus: Keep the chat easy, warm, and human even if the topic is random."
     ),
     ("human", "{user_message}")
-])
\ No newline at end of file
+])
+
+# — Cosmic Energy Card Prompt (batch generation of daily cards) —
+cosmic_energy_card_prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a warm, insightful astrologer writing short daily cosmic energy cards for an astrology app.\n"
+     "Your tone is cozy, positive, and human — like a close friend sharing a gentle heads-up. ✨\n"
+     "Write for one zodiac sign, one energy theme, and one specific day.\n"
+     "Respond with JSON only, using exactly these keys:\n"
+     "- \"insight\": one short sentence (max 20 words) with 1 emoji.\n"
+     "- \"extended_insight\": 2–3 sentences expanding on the insight with a soft, practical suggestion."
+    ),
+    ("human", "Zodiac sign: {zodiac_sign}\nEnergy theme: {energy_type}\nDate: {date}")
+])
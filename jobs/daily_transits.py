@@ -0,0 +1,84 @@
+# Nightly daily-transit computation for the whole user base
+# Computes the day's planetary positions once, scores aspects against every stored natal
+# chart in NumPy blocks, and upserts the daily_context rows in bulk chunks.
+#
+# Run: python -m jobs.daily_transits --date 2025-01-01
+
+import argparse
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+import supabase_helpers as sb
+from astrology.transits import daily_contexts, transit_positions
+
+logger = logging.getLogger(__name__)
+
+def iter_profile_pages(supabase, page_size: int):
+    """Keyset-paginate astro_profiles by user_id so deep pages stay cheap"""
+    last_user_id = None
+    while True:
+        query = supabase.table('astro_profiles').select("user_id, natal_chart").order("user_id").limit(page_size)
+        if last_user_id is not None:
+            query = query.gt("user_id", last_user_id)
+        rows = query.execute().data or []
+        if not rows:
+            return
+        yield rows
+        last_user_id = rows[-1]["user_id"]
+
+def run_daily_transits(
+    supabase,
+    date: datetime.date,
+    page_size: int = 10000,
+    chunk_size: int = 1000,
+    writers: int = 4
+) -> Dict[str, int]:
+    started = time.perf_counter()
+    transits = transit_positions(date)
+    users = 0
+
+    # Upserts run on a small pool so the next page is fetched and scored while the last one is written
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        pending = []
+        for profiles in iter_profile_pages(supabase, page_size):
+            contexts = daily_contexts(profiles, date, transits)
+            for i in range(0, len(contexts), chunk_size):
+                pending.append(pool.submit(sb.save_daily_contexts, supabase, contexts[i:i + chunk_size]))
+            users += len(contexts)
+
+            # Surface write errors early and keep the number of queued chunks bounded
+            while len(pending) > writers * 2:
+                pending.pop(0).result()
+            logger.info(f"Scored {users} users ({time.perf_counter() - started:.1f}s)")
+
+        for future in pending:
+            future.result()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Daily transits for {date}: {users} users in {elapsed:.1f}s")
+    return {"users": users, "seconds": round(elapsed, 1)}
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compute daily transits and aspects for every user")
+    parser.add_argument("--date", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="Date to compute (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--page-size", type=int, default=10000, help="Profiles fetched and scored per block")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per bulk upsert")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent upsert requests")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY"))
+    print(run_daily_transits(supabase, args.date, args.page_size, args.chunk_size, args.writers))
+
+if __name__ == "__main__":
+    main()
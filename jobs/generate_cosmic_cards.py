@@ -0,0 +1,128 @@
+# Batch generation of daily cosmic energy cards
+# Fans out every (zodiac sign x energy type x date) combination to the LLM with bounded
+# concurrency, retries failures, and bulk-inserts the results in chunks.
+#
+# Run: python -m jobs.generate_cosmic_cards --days 7
+
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_openai import ChatOpenAI
+from supabase import acreate_client
+
+from astrology.zodiac import ZODIAC_SIGNS
+from chains.multi_prompt_chain import PromptChain
+from chains.prompts import cosmic_energy_card_prompt
+
+logger = logging.getLogger(__name__)
+
+def build_card_chain(llm=None, max_attempts: int = 3):
+    llm = llm or ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.9,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_tokens=200
+    )
+    chain = PromptChain(cosmic_energy_card_prompt, llm, JsonOutputParser())
+    # Failed items (API errors, unparseable JSON) are retried with jittered backoff
+    return chain.with_retry(stop_after_attempt=max_attempts, wait_exponential_jitter=True)
+
+async def fetch_existing_cards(supabase, start: datetime.date, end: datetime.date) -> set:
+    result = await supabase.table('cosmic_energy_cards').select(
+        "zodiac_sign, type_id, date"
+    ).gte("date", start.isoformat()).lte("date", end.isoformat()).execute()
+    return {(row["zodiac_sign"], str(row["type_id"]), str(row["date"])) for row in result.data or []}
+
+async def generate_cards(
+    supabase,
+    start: datetime.date,
+    days: int,
+    chain=None,
+    max_concurrency: int = 16,
+    chunk_size: int = 200,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    chain = chain or build_card_chain()
+    end = start + datetime.timedelta(days=days - 1)
+
+    types_result = await supabase.table('cosmic_energy_types').select("*").execute()
+    energy_types = types_result.data or []
+    existing = await fetch_existing_cards(supabase, start, end)
+
+    # Every combination that doesn't have a card yet, so re-runs only fill the gaps
+    combos = []
+    for offset in range(days):
+        date = (start + datetime.timedelta(days=offset)).isoformat()
+        for energy_type in energy_types:
+            for sign in ZODIAC_SIGNS:
+                if (sign, str(energy_type["id"]), date) not in existing:
+                    combos.append((sign, energy_type, date))
+
+    logger.info(f"Generating {len(combos)} cards for {start} .. {end} ({len(existing)} already exist)")
+    if not combos:
+        return {"generated": 0, "failed": 0, "skipped": len(existing)}
+
+    inputs = [
+        {"zodiac_sign": sign, "energy_type": energy_type["name"], "date": date}
+        for sign, energy_type, date in combos
+    ]
+    outputs = await chain.abatch(inputs, config={"max_concurrency": max_concurrency}, return_exceptions=True)
+
+    rows: List[Dict[str, Any]] = []
+    failed = 0
+    for (sign, energy_type, date), output in zip(combos, outputs):
+        if isinstance(output, Exception) or not isinstance(output, dict) or not output.get("insight"):
+            failed += 1
+            logger.warning(f"Failed to generate card for {sign} / {energy_type['name']} / {date}: {output!r}")
+            continue
+        rows.append({
+            "id": str(uuid4()),
+            "type_id": str(energy_type["id"]),
+            "zodiac_sign": sign,
+            "date": date,
+            "insight": output["insight"],
+            "extended_insight": output.get("extended_insight")
+        })
+
+    if not dry_run:
+        for i in range(0, len(rows), chunk_size):
+            await supabase.table('cosmic_energy_cards').insert(rows[i:i + chunk_size]).execute()
+
+    logger.info(f"Generated {len(rows)} cards, {failed} failed")
+    return {"generated": len(rows), "failed": failed, "skipped": len(existing)}
+
+async def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate daily cosmic energy cards with the LLM")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="First date to generate (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--days", type=int, default=7, help="Number of days to generate")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum concurrent LLM calls")
+    parser.add_argument("--attempts", type=int, default=3, help="Attempts per card before giving up")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Rows per bulk insert")
+    parser.add_argument("--dry-run", action="store_true", help="Generate but don't insert")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    supabase = await acreate_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY"))
+    summary = await generate_cards(
+        supabase,
+        args.start,
+        args.days,
+        chain=build_card_chain(max_attempts=args.attempts),
+        max_concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run
+    )
+    print(summary)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+# logging_config.py
+# Process-wide logging: records are queued by the calling thread and formatted/written by a
+# background listener, so request handlers never block on formatting or stderr.
+#
+# Environment:
+#   LOG_LEVEL=INFO                          root level
+#   LOG_LEVELS=httpx=WARNING,astro_api.payloads=DEBUG
+#                                           per-module overrides (name=LEVEL, comma separated)
+#   LOG_FORMAT=text                         "json" for one JSON object per line (with request_id when tracing)
+#   LOG_PAYLOAD_MAX_CHARS=500               prompts, AI responses and DB rows are cut to this length
+#   LOG_PAYLOAD_SAMPLE_RATE=1.0             fraction of payload records kept
+
+import atexit
+import datetime
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import orjson
+
+from tracing import current_request_id
+
+# Payload logs (prompts, responses, DB rows) go through this logger, off unless enabled in LOG_LEVELS
+PAYLOAD_LOGGER = "astro_api.payloads"
+
+# Chatty third-party loggers that stay quiet unless LOG_LEVELS says otherwise
+DEFAULT_LEVELS = {
+    "httpx": "WARNING",
+    "httpcore": "WARNING",
+    "hpack": "WARNING",
+    "openai": "WARNING",
+    "urllib3": "WARNING",
+    PAYLOAD_LOGGER: "INFO",
+}
+
+_listener: Optional[QueueListener] = None
+_payload_max_chars = 500
+
+class Truncated:
+    """Lazy log argument: cut to `limit` characters, only if the record is actually emitted"""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        limit = self.limit if self.limit is not None else _payload_max_chars
+        text = str(self.value)
+        if len(text) <= limit:
+            return text
+        return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+    __repr__ = __str__
+
+class SampleFilter(logging.Filter):
+    """Keeps a random `rate` fraction of records"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1.0 or random.random() < self.rate
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+class _DeferredQueueHandler(QueueHandler):
+    # The stock prepare() formats the message on the calling thread; leave that to the listener.
+    # The request ID has to be read here, though, while the request's context is current.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = current_request_id()
+        return record
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """"httpx=WARNING,chains=DEBUG" -> {"httpx": "WARNING", "chains": "DEBUG"}"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.strip().partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging():
+    """Install the queue handler on the root logger; safe to call more than once"""
+    global _listener, _payload_max_chars
+    if _listener is not None:
+        return _listener
+
+    _payload_max_chars = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
+
+    output = logging.StreamHandler(sys.stderr)
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    levels = {**DEFAULT_LEVELS, **parse_levels(os.getenv("LOG_LEVELS", ""))}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+    if sample_rate < 1.0:
+        logging.getLogger(PAYLOAD_LOGGER).addFilter(SampleFilter(sample_rate))
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
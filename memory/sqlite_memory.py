@@ -0,0 +1,161 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from memory.tiny_memory import MemoryEntry
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tone TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memory_messages_user_seq ON memory_messages (user_id, seq);
+CREATE INDEX IF NOT EXISTS memory_messages_created_at ON memory_messages (created_at);
+"""
+
+class SQLiteMemory:
+    """TinyMemory's interface backed by a local SQLite database in WAL mode.
+
+    Every uvicorn worker on the host opens the same file, so consecutive messages from one
+    user see the same memory whichever worker they land on. WAL lets readers run alongside
+    the single writer, and a read is one indexed query on a per-thread connection.
+
+    Calls touch the disk and can wait up to 5 s on another worker's write, so async code
+    should make them from a thread (see `blocking`). Purges run on a background thread.
+    """
+
+    # Tells async callers to run memory calls through asyncio.to_thread
+    blocking = True
+
+    def __init__(self, path: str, max_memory: int = 5, max_users: int = 10000,
+                 ttl_seconds: float = 3600, purge_every: int = 1000):
+        self.path = path
+        self.max_memory = max_memory
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        # Expired and over-capacity users are purged every `purge_every` writes from this process
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._purging = False
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(_SCHEMA)
+
+    def add_message(self, user_id: str, role: str, text: str, tone: str = "neutral"):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT INTO memory_messages (user_id, role, text, tone, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, role, text, tone, time.time())
+            )
+            # Keep only the newest max_memory messages for this user
+            connection.execute(
+                "DELETE FROM memory_messages WHERE user_id = ? AND seq <= ("
+                "SELECT seq FROM memory_messages WHERE user_id = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (user_id, user_id, self.max_memory)
+            )
+
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0 and not self._purging
+            if purge:
+                self._purging = True
+        if purge:
+            threading.Thread(target=self._purge_in_background, name="sqlite-memory-purge", daemon=True).start()
+
+    def get_memory(self, user_id: str) -> List[MemoryEntry]:
+        rows = self._connection().execute(
+            "SELECT role, text, tone, created_at FROM memory_messages WHERE user_id = ? ORDER BY seq DESC LIMIT ?",
+            (user_id, self.max_memory)
+        ).fetchall()
+
+        # Idle past the TTL counts as a miss, and the stale rows go now so nothing added next
+        # (e.g. history rehydrated from Supabase) lands on top of them
+        if not rows or time.time() - rows[0][3] > self.ttl_seconds:
+            if rows:
+                self.clear_memory(user_id)
+            with self._lock:
+                self.misses += 1
+            return []
+
+        with self._lock:
+            self.hits += 1
+        return [MemoryEntry(role, text, tone) for role, text, tone, _ in reversed(rows)]
+
+    def replace_memory(self, user_id: str, messages: Iterable[Tuple[str, str]]):
+        """Set the user's memory to `messages` ((role, text), oldest first) in one transaction,
+        so concurrent replacements from other threads or workers can't interleave"""
+        messages = list(messages)[-self.max_memory:]
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM memory_messages WHERE user_id = ?", (user_id,))
+            connection.executemany(
+                "INSERT INTO memory_messages (user_id, role, text, tone, created_at) VALUES (?, ?, ?, 'neutral', ?)",
+                [(user_id, role, text, now) for role, text in messages]
+            )
+
+    def clear_memory(self, user_id: str):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM memory_messages WHERE user_id = ?", (user_id,))
+
+    def purge(self, connection: Optional[sqlite3.Connection] = None):
+        """Drop users idle past the TTL, then the least recently active beyond max_users.
+
+        Like TinyMemory, the TTL applies to a user's last message, so an active conversation
+        keeps its older turns."""
+        connection = connection or self._connection()
+        with connection:
+            connection.execute(
+                "DELETE FROM memory_messages WHERE user_id IN ("
+                "SELECT user_id FROM memory_messages GROUP BY user_id HAVING MAX(created_at) < ?)",
+                (time.time() - self.ttl_seconds,)
+            )
+            connection.execute(
+                "DELETE FROM memory_messages WHERE user_id IN ("
+                "SELECT user_id FROM memory_messages GROUP BY user_id ORDER BY MAX(seq) DESC LIMIT -1 OFFSET ?)",
+                (self.max_users,)
+            )
+
+    def _purge_in_background(self):
+        # Own connection, closed afterwards, instead of leaving a thread-local one behind
+        connection = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            self.purge(connection)
+        except Exception as e:
+            logger.warning(f"Error purging chat memory: {str(e)}")
+        finally:
+            connection.close()
+            with self._lock:
+                self._purging = False
+
+    def stats(self) -> Dict[str, int]:
+        users = self._connection().execute("SELECT COUNT(DISTINCT user_id) FROM memory_messages").fetchone()[0]
+        with self._lock:
+            return {"users": users, "hits": self.hits, "misses": self.misses}
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
@@ -1,14 +1,110 @@
-from collections import defaultdict, deque
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Tuple
+
+class MemoryEntry:
+    """One remembered message; slots keep per-message overhead small"""
+    __slots__ = ("role", "text", "tone")
+
+    def __init__(self, role: str, text: str, tone: str = "neutral"):
+        self.role = role
+        self.text = text
+        self.tone = tone
+
+    def __repr__(self):
+        return f"MemoryEntry(role={self.role!r}, text={self.text!r}, tone={self.tone!r})"
+
+class _UserMemory:
+    __slots__ = ("messages", "last_seen")
+
+    def __init__(self, max_memory: int, now: float):
+        self.messages = deque(maxlen=max_memory)
+        self.last_seen = now
 
 class TinyMemory:
-    def __init__(self, max_memory: int = 5):
-        self.memory = defaultdict(lambda: deque(maxlen=max_memory))
+    """Last few messages per user, bounded by user count (LRU) and idle time (TTL).
+
+    Users are kept in access order, so both the least recently used and the longest idle
+    users sit at the front and are dropped from there.
+    """
 
-    def add_message(self, user_id: str, role: str, text: str):
-        self.memory[user_id].append({"role": role, "text": text})
+    def __init__(self, max_memory: int = 5, max_users: int = 10000, ttl_seconds: float = 3600):
+        self.max_memory = max_memory
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[str, _UserMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
-    def get_memory(self, user_id: str):
-        return list(self.memory[user_id])
+    def add_message(self, user_id: str, role: str, text: str, tone: str = "neutral"):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            user = self._users.get(user_id)
+            if user is None:
+                user = self._users[user_id] = _UserMemory(self.max_memory, now)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._users.move_to_end(user_id)
+                user.last_seen = now
+            user.messages.append(MemoryEntry(role, text, tone))
+
+    def get_memory(self, user_id: str) -> List[MemoryEntry]:
+        now = time.monotonic()
+        with self._lock:
+            # Unknown users are a miss, not a new (empty) entry
+            user = self._users.get(user_id)
+            if user is None or now - user.last_seen > self.ttl_seconds:
+                if user is not None:
+                    del self._users[user_id]
+                    self.expirations += 1
+                self.misses += 1
+                return []
+            self._users.move_to_end(user_id)
+            user.last_seen = now
+            self.hits += 1
+            return list(user.messages)
+
+    def replace_memory(self, user_id: str, messages: Iterable[Tuple[str, str]]):
+        """Set the user's memory to `messages` ((role, text), oldest first) in one step"""
+        now = time.monotonic()
+        user = _UserMemory(self.max_memory, now)
+        user.messages.extend(MemoryEntry(role, text) for role, text in messages)
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._users[user_id] = user
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
 
     def clear_memory(self, user_id: str):
-        self.memory.pop(user_id, None)
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self):
+        return len(self._users)
+
+    def _expire(self, now: float):
+        # Idle users collect at the front, so stop at the first one that is still fresh
+        while self._users:
+            user_id, user = next(iter(self._users.items()))
+            if now - user.last_seen <= self.ttl_seconds:
+                break
+            del self._users[user_id]
+            self.expirations += 1
@@ -0,0 +1,309 @@
+# metrics.py
+# In-process counters and histograms rendered in the Prometheus text format on /metrics.
+# Recording a sample is a dict lookup and a few additions under a lock, cheap enough to
+# leave on in production. Each worker process keeps its own numbers.
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import tracing
+
+# Seconds; covers cached lookups (~1 ms) through slow LLM calls (~10 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class CallbackGauge:
+    """Gauge read at scrape time; `collect` returns {label values: value}"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "astro_http_request_duration_seconds", "Request latency by route", ("method", "route", "status")
+))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "astro_db_query_duration_seconds", "Supabase/PostgREST call latency by table", ("table", "method", "status")
+))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    "astro_llm_duration_seconds", "LLM call latency", ("model", "status")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "astro_llm_tokens_total", "Tokens reported by the LLM provider", ("model", "kind")
+))
+
+# Route template of requests that matched no route, so unknown paths don't add label values
+UNMATCHED_ROUTE = "unmatched"
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                str(status["code"]),
+            )
+
+def _query_labels(builder) -> Tuple[str, str]:
+    request = getattr(builder, "request", builder)
+    path = str(getattr(request, "path", "") or "")
+    segments = [segment for segment in path.split("?")[0].split("/") if segment]
+    table = segments[-1] if segments else "unknown"
+    if len(segments) > 1 and segments[-2] == "rpc":
+        table = f"rpc:{table}"
+    return table, str(getattr(request, "http_method", "") or "")
+
+def _observe_query(builder, start: float, status: str):
+    duration = time.perf_counter() - start
+    table, method = _query_labels(builder)
+    DB_QUERY_SECONDS.observe(duration, table, method, status)
+    tracing.record("db", start, duration, f"{method} {table}")
+
+def _timed_execute(execute):
+    def timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = execute(self, *args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            _observe_query(self, start, status)
+    return timed
+
+def _timed_async_execute(execute):
+    async def timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await execute(self, *args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            _observe_query(self, start, status)
+    return timed
+
+def instrument_postgrest():
+    """Time every supabase.table(...)/rpc(...).execute(), sync and async, by table"""
+    from postgrest._async import request_builder as async_builders
+    from postgrest._sync import request_builder as sync_builders
+
+    for module, wrap in ((sync_builders, _timed_execute), (async_builders, _timed_async_execute)):
+        for cls in vars(module).values():
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            execute = cls.__dict__.get("execute")
+            if execute is None or getattr(execute, "_timed", False):
+                continue
+            timed = wrap(execute)
+            timed._timed = True
+            timed.__name__ = execute.__name__
+            timed.__doc__ = execute.__doc__
+            setattr(cls, "execute", timed)
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records LLM latency and token usage for every chat model call it's attached to"""
+
+    # Called directly on the event loop instead of being pushed to a thread pool
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[object, Tuple[float, str]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, model = started
+        model = ((response.llm_output or {}).get("model_name") or model)
+        duration = time.perf_counter() - start
+        LLM_SECONDS.observe(duration, model, "ok")
+        tracing.record("llm", start, duration, model)
+
+        usage = _usage(response)
+        if usage:
+            LLM_TOKENS.inc(model, "input", amount=usage[0])
+            LLM_TOKENS.inc(model, "output", amount=usage[1])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            duration = time.perf_counter() - started[0]
+            LLM_SECONDS.observe(duration, started[1], "error")
+            tracing.record("llm", started[0], duration, f"{started[1]} error")
+
+    def _start(self, serialized, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or (serialized or {}).get("name") or "unknown"
+        self._started[run_id] = (time.perf_counter(), str(model))
+
+def _usage(response) -> Optional[Tuple[int, int]]:
+    """(input, output) tokens from the message usage metadata, which streaming calls report
+    with stream_usage=True, or the provider's token_usage"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    if token_usage:
+        return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+    return None
+
+def stats_gauges(name: str, help: str, sources: Iterable[Tuple[str, Callable[[], Dict]]], keys: Sequence[str]) -> CallbackGauge:
+    """Gauge over the numeric stats() values of several components, labelled (component, key)"""
+    sources = list(sources)
+
+    def collect():
+        values = {}
+        for component, stats in sources:
+            try:
+                current = stats()
+            except Exception:
+                continue
+            for key in keys:
+                if isinstance(current.get(key), (int, float)):
+                    values[(component, key)] = current[key]
+        return values
+
+    return CallbackGauge(name, help, ("component", "stat"), collect)
+
+def hit_ratio_gauge(name: str, help: str, sources: Iterable[Tuple[str, Callable[[], Dict]]]) -> CallbackGauge:
+    """hits / (hits + misses) per component, from their stats()"""
+    sources = list(sources)
+
+    def collect():
+        values = {}
+        for component, stats in sources:
+            try:
+                current = stats()
+            except Exception:
+                continue
+            lookups = current.get("hits", 0) + current.get("misses", 0)
+            if lookups:
+                values[(component,)] = current.get("hits", 0) / lookups
+        return values
+
+    return CallbackGauge(name, help, ("component",), collect)
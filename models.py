@@ -206,6 +206,24 @@ class SubscriptionResponse(SubscriptionBase):
     class Config:
         from_attributes = True
 
+# Astro Profile models
+class AstroProfileRequest(BaseModel):
+    user_id: UUID
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    timezone: Optional[str] = None  # IANA name of the birth place, e.g. 'Asia/Kolkata'; defaults to UTC
+    house_system: str = "P"  # Swiss Ephemeris house system code, Placidus by default
+
+class AstroProfileResponse(BaseModel):
+    user_id: UUID
+    sun_sign: Optional[str] = None
+    moon_sign: Optional[str] = None
+    rising_sign: Optional[str] = None
+    natal_chart: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
+
 # Request models
 class UserIdRequest(BaseModel):
     user_id: UUID
@@ -0,0 +1,20 @@
+# responses.py
+# JSON rendering for API responses
+
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+def json_default(obj):
+    """orjson fallback for the types it doesn't serialize natively"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, which serializes UUID, date, datetime and time
+    natively and runs several times faster than json.dumps with an encoder class"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,56 @@
+-- Single-round-trip persistence for chat turns and new users
+--
+-- Each function runs as one statement inside one transaction, so all of its writes are
+-- committed together or not at all, and the API pays one network round trip instead of
+-- two or three. Run this file from the Supabase SQL editor; PostgREST exposes the
+-- functions as POST /rest/v1/rpc/<name>, called with supabase.rpc(...).
+
+-- Insert the messages of one chat turn (user message and assistant reply). Returns the
+-- inserted message rows. The conversation's updated_at is touched separately by the API's
+-- write-behind queue, coalesced across turns.
+create or replace function public.record_chat_turn(
+    p_conversation_id uuid,
+    p_messages jsonb
+)
+returns setof public.messages
+language sql
+as $$
+    insert into public.messages (id, conversation_id, user_id, content, role, "timestamp")
+    select
+        (m ->> 'id')::uuid,
+        p_conversation_id,
+        (m ->> 'user_id')::uuid,
+        m ->> 'content',
+        m ->> 'role',
+        (m ->> 'timestamp')::timestamptz
+    from jsonb_array_elements(p_messages) as m
+    returning *;
+$$;
+
+-- Create a user together with their "Welcome" conversation and the assistant's welcome
+-- message. Returns the new user row.
+create or replace function public.create_user_with_welcome(
+    p_user jsonb,
+    p_welcome_message text
+)
+returns setof public.users
+language plpgsql
+as $$
+declare
+    v_user public.users;
+    v_conversation_id uuid := gen_random_uuid();
+begin
+    insert into public.users (name, pronouns, birth_date, birth_time, birth_place, email, profile_picture_url, is_premium)
+    select name, pronouns, birth_date, birth_time, birth_place, email, profile_picture_url, coalesce(is_premium, false)
+    from jsonb_populate_record(null::public.users, p_user)
+    returning * into v_user;
+
+    insert into public.conversations (id, user_id, title, created_at, updated_at)
+    values (v_conversation_id, v_user.id, 'Welcome', now(), now());
+
+    insert into public.messages (id, conversation_id, content, role, "timestamp")
+    values (gen_random_uuid(), v_conversation_id, p_welcome_message, 'assistant', now());
+
+    return next v_user;
+end;
+$$;
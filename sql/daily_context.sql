@@ -0,0 +1,20 @@
+-- One daily_context row per user per day
+--
+-- jobs/daily_transits.py upserts with on_conflict=user_id,date, which PostgREST turns into
+-- INSERT ... ON CONFLICT (user_id, date); Postgres rejects that unless a unique constraint or
+-- index covers exactly those columns. The constraint also serves the (user_id, date) lookups
+-- in get_daily_context.
+--
+-- Building the index CONCURRENTLY avoids locking the table for writes; run each statement on
+-- its own (not inside a transaction block) from the Supabase SQL editor or psql.
+
+-- Existing duplicates would make the index build fail; keep one row of each (user_id, date):
+-- delete from public.daily_context a
+--     using public.daily_context b
+--     where a.user_id = b.user_id and a.date = b.date and a.ctid < b.ctid;
+
+create unique index concurrently if not exists daily_context_user_id_date_key
+    on public.daily_context (user_id, date);
+
+alter table public.daily_context
+    add constraint daily_context_user_id_date_key unique using index daily_context_user_id_date_key;
@@ -0,0 +1,16 @@
+-- Indexes for message history reads
+--
+-- GET /messages/{conversation_id} pages with keyset cursors on (timestamp, id) and the chat
+-- memory hydration reads the latest N messages of a conversation. Both are served by one
+-- composite index: an equality match on conversation_id followed by an ordered range scan
+-- that stops after `limit` rows, in either direction.
+--
+-- CONCURRENTLY avoids locking the table for writes while the index builds; run each
+-- statement on its own (not inside a transaction block) from the Supabase SQL editor or psql.
+
+create index concurrently if not exists messages_conversation_timestamp_id_idx
+    on public.messages (conversation_id, "timestamp", id);
+
+-- The old single-column index on conversation_id, if there is one, is a prefix of the index
+-- above and can be dropped once the new index is valid:
+-- drop index concurrently if exists messages_conversation_id_idx;
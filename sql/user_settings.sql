@@ -0,0 +1,61 @@
+-- Single-round-trip writes for companion energies and subscriptions
+--
+-- Like sql/chat_persistence.sql: each function runs inside one transaction, so its writes are
+-- committed together or not at all, and the API pays one network round trip. A missing user
+-- or companion energy fails the insert's foreign key (23503) and rolls everything back; the
+-- API turns that into a 404. Run this file from the Supabase SQL editor.
+
+-- Make a companion energy the user's active one: deactivate the previous active entries and
+-- insert the new entry. Returns the inserted row. Concurrent calls for the same user are
+-- serialized on the user's row, so exactly one entry ends up active.
+create or replace function public.set_user_companion_energy(
+    p_energy jsonb
+)
+returns setof public.user_companion_energies
+language plpgsql
+as $$
+declare
+    v_energy public.user_companion_energies;
+begin
+    v_energy := jsonb_populate_record(null::public.user_companion_energies, p_energy);
+
+    perform 1 from public.users where id = v_energy.user_id for no key update;
+
+    if coalesce(v_energy.is_active, true) then
+        update public.user_companion_energies
+        set is_active = false
+        where user_id = v_energy.user_id and is_active;
+    end if;
+
+    return query
+    insert into public.user_companion_energies (id, user_id, companion_energy_id, is_active)
+    values (
+        coalesce(v_energy.id, gen_random_uuid()),
+        v_energy.user_id,
+        v_energy.companion_energy_id,
+        coalesce(v_energy.is_active, true)
+    )
+    returning *;
+end;
+$$;
+
+-- Insert a subscription and flag its user as premium. Returns the inserted row.
+create or replace function public.create_subscription(
+    p_subscription jsonb
+)
+returns setof public.subscriptions
+language plpgsql
+as $$
+declare
+    v_subscription public.subscriptions;
+begin
+    insert into public.subscriptions (id, user_id, plan_name, price, billing_period, start_date, end_date, is_active)
+    select coalesce(id, gen_random_uuid()), user_id, plan_name, price, billing_period, start_date, end_date, coalesce(is_active, true)
+    from jsonb_populate_record(null::public.subscriptions, p_subscription)
+    returning * into v_subscription;
+
+    update public.users set is_premium = true where id = v_subscription.user_id;
+
+    return next v_subscription;
+end;
+$$;
@@ -1,6 +1,6 @@
 # supabase_helpers.py
 
-from supabase import Client
+from supabase import Client, AsyncClient
 from typing import Dict, List
 import uuid
 import datetime
@@ -24,6 +24,37 @@ def create_user(supabase: Client, user: dict):
     except Exception as e:
         raise Exception(f"Failed to create user: {str(e)}")
 
+def create_user_with_welcome(supabase: Client, user: dict, welcome_message: str):
+    """Insert the user, their welcome conversation and welcome message in one transaction
+    (see sql/chat_persistence.sql)"""
+    response = supabase.rpc('create_user_with_welcome', {
+        "p_user": user,
+        "p_welcome_message": welcome_message
+    }).execute()
+    return response.data[0] if response.data else None
+
+async def record_chat_turn(supabase: AsyncClient, conversation_id: str, messages: List[dict]):
+    """Insert a turn's messages in one transaction (see sql/chat_persistence.sql).
+    Returns the inserted rows in the order given."""
+    response = await supabase.rpc('record_chat_turn', {
+        "p_conversation_id": conversation_id,
+        "p_messages": messages
+    }).execute()
+    rows = {str(row["id"]): row for row in response.data or []}
+    return [rows[message["id"]] for message in messages]
+
+async def set_user_companion_energy(supabase: AsyncClient, energy: dict):
+    """Deactivate the user's current companion energy and insert the new one in one
+    transaction (see sql/user_settings.sql)"""
+    response = await supabase.rpc('set_user_companion_energy', {"p_energy": energy}).execute()
+    return response.data[0] if response.data else None
+
+async def create_subscription(supabase: AsyncClient, subscription: dict):
+    """Insert the subscription and flag the user as premium in one transaction
+    (see sql/user_settings.sql)"""
+    response = await supabase.rpc('create_subscription', {"p_subscription": subscription}).execute()
+    return response.data[0] if response.data else None
+
 def get_user(supabase: Client, user_id: str):
     result = supabase.table('users').select("*").eq("user_id", user_id).single().execute()
     return result.data
@@ -53,6 +84,11 @@ def save_daily_context(supabase: Client, user_id: str, context: dict):
     }
     return supabase.table('daily_context').upsert(data).execute()
 
+def save_daily_contexts(supabase: Client, contexts: List[dict]):
+    """Upsert a batch of daily_context rows in one request; callers size the batches.
+    Needs the unique (user_id, date) constraint from sql/daily_context.sql"""
+    supabase.table('daily_context').upsert(contexts, on_conflict="user_id,date").execute()
+
 def get_daily_context(supabase: Client, user_id: str, date: str):
     result = supabase.table('daily_context').select("*").eq("user_id", user_id).eq("date", date).single().execute()
     return result.data
@@ -0,0 +1,47 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from astrology.zodiac import get_zodiac_sign, get_zodiac_traits, zodiac_signs
+from benchmarks.bench_zodiac import legacy_get_zodiac_sign
+
+LEAP_YEAR = [datetime.date(2024, 1, 1) + datetime.timedelta(days=i) for i in range(366)]
+EXPECTED = [legacy_get_zodiac_sign(day) for day in LEAP_YEAR]
+
+
+def test_leap_year_covers_every_day():
+    assert LEAP_YEAR[-1] == datetime.date(2024, 12, 31)
+    assert datetime.date(2024, 2, 29) in LEAP_YEAR
+
+
+def test_dates_match_legacy():
+    assert [get_zodiac_sign(day) for day in LEAP_YEAR] == EXPECTED
+
+
+def test_iso_strings_match_legacy():
+    assert [get_zodiac_sign(day.isoformat()) for day in LEAP_YEAR] == EXPECTED
+
+
+def test_vectorized_matches_legacy():
+    signs, traits = zodiac_signs(np.array(LEAP_YEAR, dtype="datetime64[D]"))
+    assert list(signs) == EXPECTED
+    assert list(traits) == [get_zodiac_traits(sign) for sign in EXPECTED]
+
+    signs, _ = zodiac_signs([day.isoformat() for day in LEAP_YEAR])
+    assert list(signs) == EXPECTED
+
+
+def test_vectorized_missing_date_defaults_to_aries():
+    signs, _ = zodiac_signs(np.array(["2024-07-30", "NaT"], dtype="datetime64[D]"))
+    assert list(signs) == ["Leo", "Aries"]
+
+
+@pytest.mark.parametrize("text", ["2024-1-5", "2024-2-19", "1990-12-7", "2024-03-1"])
+def test_unpadded_strings_match_legacy(text):
+    assert get_zodiac_sign(text) == legacy_get_zodiac_sign(text)
+
+
+@pytest.mark.parametrize("text", ["not a date", "", "2024-13-01", "2023-02-29"])
+def test_unparseable_strings_default_to_aries(text):
+    assert get_zodiac_sign(text) == legacy_get_zodiac_sign(text) == "Aries"
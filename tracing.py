@@ -0,0 +1,207 @@
+# tracing.py
+# Per-request spans and on-demand profiling.
+#
+# TracingMiddleware gives every request a Trace held in a context variable, so spans recorded
+# anywhere in the request (including tasks from asyncio.gather and sync endpoints' worker
+# threads) land on it. The spans come back as a Server-Timing header alongside X-Request-ID,
+# and requests slower than TRACE_SLOW_MS have their waterfall logged. Without the middleware
+# there is no Trace and span()/record() return after a single context variable lookup.
+#
+# Profiling: with PROFILE_TOKEN set, a request carrying ?profile=1 or "X-Profile: 1" plus a
+# matching X-Profile-Token header runs under pyinstrument (sampling, if installed) or cProfile,
+# and the profile is written to PROFILE_DIR. The response names it in X-Profile-Path.
+# Profilers follow the event loop thread, so work inside sync endpoints shows up as waiting.
+
+import contextvars
+import cProfile
+import hmac
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# One profiled request at a time: profilers hook the event loop thread, and cProfile can't nest
+_profiling = threading.Lock()
+
+# Server-Timing gets at most this many spans; the slow-request log gets all of them
+MAX_TIMING_SPANS = 40
+
+class Trace:
+    __slots__ = ("request_id", "start", "spans")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.start = time.perf_counter()
+        # (name, detail, start offset, duration) in seconds
+        self.spans: List[Tuple[str, str, float, float]] = []
+
+    def add(self, name: str, start: float, duration: float, detail: str = ""):
+        # list.append is atomic, so spans can arrive from worker threads
+        self.spans.append((name, detail, start - self.start, duration))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, detail, _, duration in self.spans[:MAX_TIMING_SPANS]:
+            entry = f"{name};dur={duration * 1000:.1f}"
+            if detail:
+                entry += f';desc="{detail}"'
+            entries.append(entry)
+        entries.append(f"app;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def waterfall(self) -> str:
+        return "\n".join(
+            f"  +{offset * 1000:8.1f} ms {duration * 1000:8.1f} ms  {name} {detail}".rstrip()
+            for name, detail, offset, duration in sorted(self.spans, key=lambda span: span[2])
+        )
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+def current_request_id() -> Optional[str]:
+    trace = _current.get()
+    return trace.request_id if trace is not None else None
+
+def record(name: str, start: float, duration: float, detail: str = ""):
+    """Add an already-timed span (start from time.perf_counter()) to the current request"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, start, duration, detail)
+
+class span:
+    """with span("classify"): ... times the block as a span of the current request"""
+
+    __slots__ = ("name", "detail", "trace", "start")
+
+    def __init__(self, name: str, detail: str = ""):
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            self.trace.add(self.name, self.start, time.perf_counter() - self.start, self.detail)
+        return False
+
+class _RequestProfiler:
+    def __init__(self, directory: str, request_id: str):
+        self.directory = directory
+        self.request_id = request_id
+        if SamplingProfiler is not None:
+            self.profiler = SamplingProfiler(async_mode="enabled")
+            self.path = os.path.join(directory, f"{request_id}.html")
+        else:
+            self.profiler = cProfile.Profile()
+            self.path = os.path.join(directory, f"{request_id}.txt")
+
+    def start(self):
+        if SamplingProfiler is not None:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if SamplingProfiler is not None:
+            self.profiler.stop()
+            with open(self.path, "w") as f:
+                f.write(self.profiler.output_html())
+        else:
+            self.profiler.disable()
+            with open(self.path, "w") as f:
+                pstats.Stats(self.profiler, stream=f).sort_stats("cumulative").print_stats(60)
+        logger.info("Profile for request %s written to %s", self.request_id, self.path)
+
+class TracingMiddleware:
+    """Pure ASGI middleware: request ID, spans -> Server-Timing, slow-request waterfall
+    logging, and admin-gated profiling"""
+
+    def __init__(self, app, trace: bool = True, slow_ms: float = 0, profile_token: Optional[str] = None,
+                 profile_dir: str = "/tmp/astro-profiles"):
+        self.app = app
+        self.trace = trace
+        self.slow_ms = slow_ms
+        self.profile_token = profile_token
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        profiling = False
+        try:
+            # Released in the outer finally, so nothing below can leak the lock
+            profiling = self.profile_token is not None and self._profile_requested(scope, headers) \
+                and _profiling.acquire(blocking=False)
+            if not self.trace and not profiling:
+                await self.app(scope, receive, send)
+                return
+            await self._traced(scope, receive, send, headers, profiling)
+        finally:
+            if profiling:
+                _profiling.release()
+
+    async def _traced(self, scope, receive, send, headers, profile: bool):
+        incoming_id = headers.get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming_id if _REQUEST_ID_PATTERN.match(incoming_id) else uuid.uuid4().hex
+        trace = Trace(request_id)
+        profiler = _RequestProfiler(self.profile_dir, request_id) if profile else None
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                extra = [(b"x-request-id", request_id.encode())]
+                if self.trace:
+                    extra.append((b"server-timing", trace.server_timing().encode()))
+                if profiler is not None:
+                    extra.append((b"x-profile-path", profiler.path.encode()))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        token = _current.set(trace)
+        try:
+            if profiler is not None:
+                profiler.start()
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if profiler is not None:
+                try:
+                    profiler.stop()
+                except Exception as e:
+                    logger.error(f"Error saving profile: {str(e)}")
+            elapsed_ms = trace.elapsed() * 1000
+            if self.slow_ms and elapsed_ms >= self.slow_ms:
+                logger.warning(
+                    "Slow request %s %s %s: %.1f ms\n%s",
+                    request_id, scope["method"], scope["path"], elapsed_ms, trace.waterfall()
+                )
+            _current.reset(token)
+
+    def _profile_requested(self, scope, headers) -> bool:
+        requested = headers.get(b"x-profile") == b"1" or \
+            parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile") == ["1"]
+        if not requested:
+            return False
+        return hmac.compare_digest(headers.get(b"x-profile-token", b""), self.profile_token.encode())
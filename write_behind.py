@@ -0,0 +1,165 @@
+# write_behind.py
+# Background queue for writes that clients never read back in the same response
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Buffers non-critical inserts/updates and writes them from a background thread.
+
+    Inserts are batched per table into one multi-row insert; if that fails the rows are
+    inserted one by one, so a single bad row doesn't take the rest of the batch with it.
+    Updates are coalesced per (table, match) so repeated touches of the same row become a
+    single update. The buffer is flushed when it holds `max_batch` writes or every
+    `flush_interval` seconds, and is drained on stop(). Failed writes are retried on later
+    flushes up to `max_attempts`, except constraint violations, which can't succeed later.
+    """
+
+    def __init__(self, supabase, max_batch: int = 200, flush_interval: float = 1.0, max_attempts: int = 3):
+        self.supabase = supabase
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        # table -> [(row, attempts)]
+        self._inserts: Dict[str, List[Tuple[Dict[str, Any], int]]] = defaultdict(list)
+        # (table, match) -> (match, values, attempts)
+        self._updates: Dict[Tuple, Tuple[Dict[str, Any], Dict[str, Any], int]] = {}
+        self._pending = 0
+        self._thread = None
+        self._stopping = False
+        self.flushed = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def insert(self, table: str, row: Dict[str, Any]):
+        with self._cond:
+            self._inserts[table].append((row, 0))
+            self._added(1)
+
+    def update(self, table: str, match: Dict[str, Any], values: Dict[str, Any]):
+        key = (table, tuple(sorted(match.items())))
+        with self._cond:
+            existing = self._updates.get(key)
+            if existing is not None:
+                existing[1].update(values)
+                self.coalesced += 1
+                return
+            self._updates[key] = (dict(match), dict(values), 0)
+            self._added(1)
+
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "depth": self._pending,
+                "flushed": self.flushed,
+                "coalesced": self.coalesced,
+                "failed": self.failed,
+            }
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the background thread after draining everything still buffered"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._cond:
+                inserts, self._inserts = self._inserts, defaultdict(list)
+                updates, self._updates = self._updates, {}
+                self._pending = 0
+
+            for table, entries in inserts.items():
+                try:
+                    self.supabase.table(table).insert([row for row, _ in entries]).execute()
+                    self._count_flushed(len(entries))
+                    continue
+                except Exception as e:
+                    if len(entries) == 1:
+                        self._insert_failed(table, entries[0], e)
+                        continue
+                    logger.warning(f"Write-behind insert into {table} failed ({len(entries)} rows), inserting one by one: {str(e)}")
+
+                for entry in entries:
+                    try:
+                        self.supabase.table(table).insert(entry[0]).execute()
+                        self._count_flushed(1)
+                    except Exception as e:
+                        self._insert_failed(table, entry, e)
+
+            for key, (match, values, attempts) in updates.items():
+                try:
+                    query = self.supabase.table(key[0]).update(values)
+                    for column, value in match.items():
+                        query = query.eq(column, value)
+                    query.execute()
+                    self._count_flushed(1)
+                except Exception as e:
+                    logger.error(f"Write-behind update of {key[0]} {match} failed: {str(e)}")
+                    self._retry_update(key, match, values, attempts)
+
+    def _added(self, count: int):
+        # Called with the condition held
+        self._pending += count
+        if self._pending >= self.max_batch:
+            self._cond.notify()
+
+    def _count_flushed(self, count: int):
+        with self._cond:
+            self.flushed += count
+
+    def _insert_failed(self, table: str, entry, error: Exception):
+        row, attempts = entry
+        logger.error(f"Write-behind insert into {table} failed: {str(error)}")
+        with self._cond:
+            # Postgres class 23 (integrity constraint violation): retrying won't help
+            if attempts + 1 >= self.max_attempts or str(getattr(error, "code", "") or "").startswith("23"):
+                self.failed += 1
+                return
+            self._inserts[table].append((row, attempts + 1))
+            self._pending += 1
+
+    def _retry_update(self, key, match, values, attempts):
+        with self._cond:
+            if attempts + 1 >= self.max_attempts:
+                self.failed += 1
+                return
+            existing = self._updates.get(key)
+            if existing is not None:
+                # A newer write for the same row arrived meanwhile; it wins
+                existing[1].update({k: v for k, v in values.items() if k not in existing[1]})
+                return
+            self._updates[key] = (match, values, attempts + 1)
+            self._pending += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._pending >= self.max_batch, timeout=self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {str(e)}")
+            if stopping:
+                return